@@ -1,4 +1,5 @@
 import React from 'react';
+import { PlanAnalysis } from '../../types';
 
 interface AnalysisPanelProps {
   outputJson: string;
@@ -18,13 +19,14 @@ const AnalysisPanel: React.FC<AnalysisPanelProps> = ({ outputJson }) => {
 
   const metadata = data._metadata || data._wrapper || null;
   const analysis = data.analysis || null;
+  const planAnalysis = data.plan_analysis || null;
   const statistics = data.statistics || null;
   const unassigned = data.unassigned || [];
   const multiScenario = data.multi_scenario_metadata || null;
   const relaxation = data.relaxation_metadata || null;
   const summary = data.summary || null;
 
-  const hasWrapperData = metadata || analysis || statistics;
+  const hasWrapperData = metadata || analysis || statistics || planAnalysis;
 
   return (
     <div style={{ fontSize: '13px', lineHeight: '1.5' }}>
@@ -37,6 +39,9 @@ const AnalysisPanel: React.FC<AnalysisPanelProps> = ({ outputJson }) => {
       {/* Quality Analysis */}
       {analysis && <AnalysisSection analysis={analysis} />}
 
+      {/* Plan KPIs (?analysis=true) */}
+      {planAnalysis && <PlanAnalysisSection planAnalysis={planAnalysis} />}
+
       {/* Statistics */}
       {statistics && <StatisticsSection statistics={statistics} />}
 
@@ -235,6 +240,87 @@ const AnalysisSection: React.FC<{ analysis: any }> = ({ analysis }) => (
   </div>
 );
 
+const formatKm = (meters: number | null | undefined) =>
+  meters != null ? `${(meters / 1000).toFixed(1)} km` : '-';
+const formatMin = (seconds: number | null | undefined) =>
+  seconds != null ? `${Math.round(seconds / 60)} min` : '-';
+const formatPercent = (ratio: number | null | undefined) =>
+  ratio != null ? `${(ratio * 100).toFixed(0)}%` : '-';
+
+const PlanAnalysisSection: React.FC<{ planAnalysis: PlanAnalysis }> = ({ planAnalysis }) => {
+  const { fleet, vehicles } = planAnalysis;
+  const percentileRows: Array<[string, string, (v: number | null | undefined) => string]> = [
+    ['Distance', 'distance', formatKm],
+    ['Duration', 'duration', formatMin],
+    ['Stops', 'stops', (v) => (v != null ? String(v) : '-')],
+    ['Utilization', 'utilization', formatPercent],
+  ];
+
+  return (
+    <div style={sectionStyle}>
+      <SectionTitle>Plan KPIs</SectionTitle>
+      <div style={gridStyle}>
+        <StatCard label="Vehicles Used" value={`${fleet.vehicles_used} / ${fleet.vehicles_total}`} />
+        <StatCard label="Stops" value={fleet.stops} />
+        <StatCard label="Unassigned" value={fleet.unassigned} color={fleet.unassigned > 0 ? '#dc3545' : '#28a745'} />
+      </div>
+
+      {/* Fleet percentiles */}
+      <table style={{ ...tableStyle, marginTop: '10px' }}>
+        <thead>
+          <tr style={{ backgroundColor: '#f0f0f0' }}>
+            <th style={thStyle}>Per Vehicle</th>
+            <th style={thStyle}>p50</th>
+            <th style={thStyle}>p90</th>
+            <th style={thStyle}>p95</th>
+            <th style={thStyle}>Max</th>
+          </tr>
+        </thead>
+        <tbody>
+          {percentileRows.map(([label, key, format]) => {
+            const stats = fleet.percentiles[key];
+            return (
+              <tr key={key}>
+                <td style={tdStyle}>{label}</td>
+                <td style={tdStyle}>{format(stats?.p50)}</td>
+                <td style={tdStyle}>{format(stats?.p90)}</td>
+                <td style={tdStyle}>{format(stats?.p95)}</td>
+                <td style={tdStyle}>{format(stats?.max)}</td>
+              </tr>
+            );
+          })}
+        </tbody>
+      </table>
+
+      {/* Per-vehicle KPIs */}
+      {vehicles.length > 0 && (
+        <table style={{ ...tableStyle, marginTop: '10px' }}>
+          <thead>
+            <tr style={{ backgroundColor: '#f0f0f0' }}>
+              <th style={thStyle}>Vehicle</th>
+              <th style={thStyle}>Stops</th>
+              <th style={thStyle}>Distance</th>
+              <th style={thStyle}>Duration</th>
+              <th style={thStyle}>Load</th>
+            </tr>
+          </thead>
+          <tbody>
+            {vehicles.map((v, i) => (
+              <tr key={i}>
+                <td style={tdStyle}>{v.vehicle ?? i}</td>
+                <td style={tdStyle}>{v.stops}</td>
+                <td style={tdStyle}>{formatKm(v.distance)}</td>
+                <td style={tdStyle}>{formatMin(v.duration)}</td>
+                <td style={tdStyle}>{formatPercent(v.utilization)}</td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      )}
+    </div>
+  );
+};
+
 const StatisticsSection: React.FC<{ statistics: any }> = ({ statistics }) => {
   const cost = statistics.cost_breakdown;
   const time = statistics.time_analysis;
@@ -518,7 +604,7 @@ const tdStyle: React.CSSProperties = {
 export function hasAnalysisData(outputJson: string): boolean {
   try {
     const data = JSON.parse(outputJson);
-    return !!(data.analysis || data.statistics || data._metadata || (data.unassigned && data.unassigned.length > 0));
+    return !!(data.analysis || data.plan_analysis || data.statistics || data._metadata || (data.unassigned && data.unassigned.length > 0));
   } catch {
     return false;
   }
@@ -70,21 +70,46 @@ export const useServers = (): UseServersResult => {
     }
   }, []);
 
+  /**
+   * Applies health reported by the backend (/servers) to proxied servers and
+   * probes only the servers the browser calls directly.
+   */
+  const resolveStatuses = useCallback(async (list: Server[]): Promise<Server[]> => {
+    let backendServers = new Map<string, Server>();
+    try {
+      const response = await getAvailableServers();
+      backendServers = new Map(response.servers.map(s => [s.name, s]));
+    } catch (e) {
+      console.warn('Backend server list unavailable');
+    }
+
+    return Promise.all(
+      list.map(async (s) => {
+        const backend = backendServers.get(s.name);
+        if (s.type !== 'direct' && backend) {
+          return {
+            ...s,
+            status: backend.status || 'unknown',
+            replicas: backend.replicas,
+            lastChecked: new Date().toISOString()
+          };
+        }
+        return {
+          ...s,
+          status: await checkHealth(s),
+          lastChecked: new Date().toISOString()
+        };
+      })
+    );
+  }, [checkHealth]);
+
   const refreshStatus = useCallback(async () => {
     const currentServers = serversRef.current;
     if (currentServers.length === 0) return;
 
     setServers(prev => prev.map(s => ({ ...s, status: 'checking' })));
-
-    const checkedResults = await Promise.all(
-      currentServers.map(async (s) => ({
-        ...s,
-        status: await checkHealth(s),
-        lastChecked: new Date().toISOString()
-      }))
-    );
-    setServers(checkedResults);
-  }, [checkHealth]);
+    setServers(await resolveStatuses(currentServers));
+  }, [resolveStatuses]);
 
   // Initial fetch on mount
   useEffect(() => {
@@ -110,14 +135,7 @@ export const useServers = (): UseServersResult => {
         const initialStatus = allServers.map(s => ({ ...s, status: 'checking' as ServerStatus }));
         setServers(initialStatus);
 
-        const results = await Promise.all(
-          initialStatus.map(async (s) => ({
-            ...s,
-            status: await checkHealth(s),
-            lastChecked: new Date().toISOString()
-          }))
-        );
-        setServers(results);
+        setServers(await resolveStatuses(initialStatus));
 
       } catch (err) {
         setError('Failed to initialize servers');
@@ -127,7 +145,7 @@ export const useServers = (): UseServersResult => {
     };
 
     initServers();
-  }, [checkHealth]); // Only run on mount (checkHealth is stable)
+  }, [resolveStatuses]); // Only run on mount (resolveStatuses is stable)
 
   // Auto-refresh timer
   useEffect(() => {
@@ -1,11 +1,14 @@
 import axios from 'axios';
-import { Server, AsyncJob, RoutingResponse, PreprocessorResponse, MapMatchingRequest, MapMatchingResponse } from '../types';
+import { Server, AsyncJob, RoutingResponse, PreprocessorResponse, MapMatchingRequest, MapMatchingResponse, PlanAnalysis, JobFeatures } from '../types';
 import { isDirectServer, getDirectServerUrl } from '../utils/serverHelpers';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || `http://${window.location.hostname}:8080`;
 
+const API_KEY = process.env.REACT_APP_API_KEY;
+
 const api = axios.create({
   baseURL: API_BASE_URL,
+  headers: API_KEY ? { 'X-API-Key': API_KEY } : {},
 });
 
 // Storage for frontend-managed async requests to direct servers
@@ -176,6 +179,31 @@ export const getJobStatus = async (jobId: string): Promise<AsyncJob> => {
   return response.data;
 };
 
+export const cancelJob = async (jobId: string): Promise<AsyncJob> => {
+  const response = await api.delete(`/job/${jobId}`);
+  return response.data;
+};
+
+// 완료된 작업의 경로 KPI (서버에서 계산 후 캐시)
+export const getJobAnalysis = async (jobId: string): Promise<PlanAnalysis> => {
+  const response = await api.get(`/job/${jobId}/analysis`);
+  return response.data;
+};
+
+// 지도 뷰포트와 겹치는 경로/스텝만 조회 (bbox: Leaflet bounds.toBBoxString() 형식)
+export const getJobFeatures = async (
+  jobId: string,
+  bbox: string,
+  zoom?: number,
+  page: number = 1,
+  pageSize: number = 50
+): Promise<JobFeatures> => {
+  const response = await api.get(`/job/${jobId}/features`, {
+    params: { bbox, zoom, page, page_size: pageSize },
+  });
+  return response.data;
+};
+
 export const pollJobUntilComplete = async (
   jobId: string,
   onProgress?: (job: AsyncJob) => void
@@ -197,6 +225,10 @@ export const pollJobUntilComplete = async (
       return job.result;
     }
 
+    if (job.status === 'cancelled') {
+      throw new Error('Job cancelled');
+    }
+
     if (job.status === 'failed') {
       // Clean up frontend-managed job
       if (jobId.startsWith('frontend-')) {
@@ -82,6 +82,9 @@ export interface RoutingResponse {
   unassigned: Array<Record<string, any>>;
   routes: Route[];
   engine: string;
+  partial?: boolean;
+  // analysis 필드는 VROOM wrapper의 품질 분석이 사용
+  plan_analysis?: PlanAnalysis;
   metadata?: {
     elapsedTime?: number;
     [key: string]: any;
@@ -105,6 +108,18 @@ export interface PreprocessorResponse {
 
 export type ServerStatus = 'up' | 'down' | 'checking' | 'unknown';
 
+export interface ReplicaHealth {
+  url: string;
+  healthy: boolean | null;
+  circuit: 'closed' | 'open' | 'half_open';
+  outstanding: number;
+  latency_ms: number | null;
+  last_checked: string | null;
+  last_error: string | null;
+  total_requests: number;
+  total_failures: number;
+}
+
 export interface Server {
   name: string;
   description: string;
@@ -112,9 +127,10 @@ export interface Server {
   type?: 'direct' | 'proxy';
   status?: ServerStatus;
   lastChecked?: string;
+  replicas?: ReplicaHealth[];
 }
 
-export type JobStatus = 'pending' | 'processing' | 'completed' | 'failed';
+export type JobStatus = 'pending' | 'processing' | 'completed' | 'failed' | 'cancelled';
 
 export interface AsyncJob {
   id: string;
@@ -123,6 +139,73 @@ export interface AsyncJob {
   updated_at: string;
   result?: RoutingResponse;
   error?: string;
+  metadata?: {
+    timings?: Record<string, number>;
+    [key: string]: any;
+  };
+  plan_analysis?: PlanAnalysis;
+}
+
+// GET /job/{id}/features: 뷰포트(bbox)와 겹치는 경로/스텝만 페이지 단위로 반환
+export interface FeatureRoute {
+  index: number;
+  vehicle: number;
+  cost: number;
+  geometry?: string | null;
+  step_count: number;
+  steps: Array<Step & { index: number }>;
+}
+
+export interface JobFeatures {
+  bbox: number[]; // [min_lng, min_lat, max_lng, max_lat]
+  zoom: number | null;
+  page: number;
+  page_size: number;
+  total_routes: number;
+  next_page: number | null;
+  routes: FeatureRoute[];
+}
+
+// GET /job/{id}/analysis, /solve?analysis=true 의 plan_analysis
+// 엔진 결과에 없는 값(예: OR-Tools의 거리/시간)은 null
+export interface VehicleAnalysis {
+  vehicle: number | string;
+  stops: number;
+  distance: number | null;
+  duration: number | null;
+  span: number | null;
+  service: number | null;
+  waiting_time: number | null;
+  max_load: Array<number | null>;
+  capacity: Array<number | null>;
+  utilization: number | null;
+}
+
+export interface FleetStats {
+  min: number;
+  max: number;
+  mean: number;
+  total: number;
+  p50: number;
+  p90: number;
+  p95: number;
+}
+
+export interface PlanAnalysis {
+  vehicles: VehicleAnalysis[];
+  fleet: {
+    vehicles_total: number;
+    vehicles_used: number;
+    stops: number;
+    unassigned: number;
+    percentiles: Record<string, FleetStats | null>;
+  };
+  unassigned: {
+    count: number;
+    by_type: Record<string, number>;
+    by_priority: Record<string, number>;
+    ids: number[];
+  };
 }
 
 // Map Matching 관련 타입들
@@ -3,9 +3,13 @@ from src.api.routes import app
 from src.utils.config import settings
 
 if __name__ == "__main__":
+    if settings.api_workers > 1 and settings.job_backend == "memory":
+        print("WARNING: JOB_BACKEND=memory is process-local; "
+              "use sqlite or redis with API_WORKERS > 1")
     uvicorn.run(
         "src.api.routes:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=settings.debug
+        reload=settings.debug,
+        workers=settings.api_workers,
     )
\ No newline at end of file
@@ -1,17 +1,35 @@
 import os
+import math
+import time
+import secrets
 import asyncio
 import httpx
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from ..models.request import RoutingRequest
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from ..models.response import RoutingResponse
-from ..models.job import JobResponse
+from ..models.job import AsyncJob, JobResponse, JobStatus, JobSummary
 from ..models.map_matching import MapMatchingRequest, MapMatchingResponse, MapMatchingPoint, MapMatchingSummary
-from ..engines.ortools_client import OrToolsClient
+from ..engines.normalize import dumps_bytes
+from ..engines.registry import engine_registry, UnknownEngineError
+from ..services.analysis import analyze_solution
+from ..services.fair_share import (
+    ANONYMOUS_TENANT, Tenant, fair_share, server_tier,
+    UnknownApiKeyError, RateLimitedError, QuotaExceededError,
+)
 from ..services.job_manager import job_manager
+from ..services.load_balancer import engine_balancer, NoHealthyReplicaError
+from ..services.metrics import metrics
 from ..utils.config import settings
-from typing import Union
+from ..utils.deadline import Deadline
+from ..utils.profiler import SamplingProfiler
+from ..utils.timing import RequestTimer
+from typing import Awaitable, Optional, TypeVar, Union
+
+T = TypeVar("T")
 
 app = FastAPI(
     title="Route Playground API",
@@ -27,13 +45,137 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ServerTimingMiddleware:
+    """Times each request; handlers add named phases to request.state.timer.
+
+    Plain ASGI rather than @app.middleware("http"): BaseHTTPMiddleware runs
+    the endpoint behind its own receive channel, so the endpoint never sees
+    the client's http.disconnect and sync solves could not be cancelled.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timer = RequestTimer()
+        scope.setdefault("state", {})["timer"] = timer
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", timer.header())
+            await send(message)
+
+        token = timer.activate()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timer.deactivate(token)
+
+
+app.add_middleware(ServerTimingMiddleware)
+
 # Serve static files for frontend if build directory exists
 frontend_build_dir = "frontend/build"
 if os.path.exists(frontend_build_dir):
     app.mount("/static", StaticFiles(directory=frontend_build_dir, html=True), name="static")
 
-# Initialize OR-Tools client (only needed for local processing)
-ortools_client = OrToolsClient()
+@app.on_event("startup")
+async def start_background_services():
+    engine_balancer.start()
+    job_manager.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await job_manager.stop()
+    await engine_balancer.stop()
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the caller of a sync solve goes away before it finishes."""
+
+
+async def run_until_disconnect(raw_request: Request, work: Awaitable[T], budget: float) -> T:
+    """Awaits a solve, cancelling it as soon as the client disconnects.
+
+    Cancelling aborts the upstream HTTP request or terminates the OR-Tools
+    process, so abandoned sync solves stop consuming engine capacity.
+    """
+    started = time.monotonic()
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.disconnect_poll_interval)
+            if done:
+                return task.result()
+            if await raw_request.is_disconnected():
+                task.cancel()
+                metrics.record_cancel(
+                    "sync_solves_disconnected", time.monotonic() - started, budget
+                )
+                raise ClientDisconnectedError()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def require_admin(raw_request: Request):
+    """Guards ?profile=1: the caller must send the configured X-Admin-Key."""
+    key = raw_request.headers.get("X-Admin-Key", "")
+    if not settings.admin_api_key or not secrets.compare_digest(key, settings.admin_api_key):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid X-Admin-Key")
+
+
+def authenticate(raw_request: Request) -> Tenant:
+    """Resolves the caller's tenant from its API key."""
+    try:
+        return fair_share.resolve(raw_request.headers.get(settings.client_api_key_header))
+    except UnknownApiKeyError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+def authorize(raw_request: Request) -> Tenant:
+    """Resolves the caller's tenant and spends a token of its rate limit.
+
+    Only for requests that start work; reads of existing jobs just authenticate.
+    """
+    tenant = authenticate(raw_request)
+    try:
+        fair_share.admit(tenant)
+    except RateLimitedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    return tenant
+
+
+def check_owner(job: Union[AsyncJob, JobSummary, None], tenant: Tenant) -> None:
+    """Reports missing jobs, and jobs of other tenants, as not found."""
+    if not job or (job.tenant or ANONYMOUS_TENANT) != tenant.name:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+async def get_tenant_job(job_id: str, tenant: Tenant) -> AsyncJob:
+    """Returns a job submitted by ``tenant``."""
+    job = await job_manager.get_job(job_id)
+    check_owner(job, tenant)
+    return job
+
+
+async def run_profiled(work: Awaitable) -> PlainTextResponse:
+    """Runs a handler under the sampling profiler and returns folded stacks."""
+    with SamplingProfiler() as profiler:
+        try:
+            await work
+        except HTTPException:
+            # A failing request is still worth a profile
+            pass
+    return PlainTextResponse(profiler.folded())
 
 
 @app.get("/")
@@ -45,10 +187,23 @@ async def root():
 async def solve_routing_problem(
     server: str,
     request: dict,
-    background_tasks: BackgroundTasks,
+    raw_request: Request,
     timeout: int = Query(300, description="Timeout in seconds", ge=10, le=1800),
-    async_request: bool = Query(False, alias="async", description="Process request asynchronously")
+    async_request: bool = Query(False, alias="async", description="Process request asynchronously"),
+    profile: bool = Query(False, description="Return (sync) or store (async) a sampling profile; admin only"),
+    analysis: bool = Query(False, description="Include plan KPIs (sync) or compute them on completion (async)")
 ) -> Union[dict, JobResponse]:
+    timer: RequestTimer = raw_request.state.timer
+    timer.mark("parse")
+
+    if profile:
+        require_admin(raw_request)
+        if not async_request:
+            return await run_profiled(solve_routing_problem(
+                server, request, raw_request, timeout, async_request,
+                profile=False, analysis=analysis
+            ))
+
     def fix_profiles(obj):
         if isinstance(obj, dict):
             for k, v in obj.items():
@@ -60,9 +215,14 @@ async def solve_routing_problem(
             for item in obj:
                 fix_profiles(item)
 
+    # The timeout budget starts when the request arrives
+    deadline = Deadline(timeout)
+    tenant = authorize(raw_request)
+
     try:
         # Fix legacy profiles in the request data
-        fix_profiles(request)
+        with timer.phase("fix_profiles"):
+            fix_profiles(request)
         
         # Debug logging
         print(f"\n=== DEBUG: Incoming request for server: {server} ===")
@@ -74,8 +234,11 @@ async def solve_routing_problem(
         
         # Handle async requests
         if async_request:
-            job = job_manager.create_job(server, request)
-            background_tasks.add_task(job_manager.process_job, job.id, timeout)
+            # Started by the job dispatcher when the tenant's fair share allows
+            job = await job_manager.create_job(
+                server, request, timeout, profile, tenant.name, analysis=analysis
+            )
+            tenant.count("async_jobs_submitted")
             return JobResponse(
                 id=job.id,
                 status=job.status,
@@ -83,53 +246,38 @@ async def solve_routing_problem(
                 updated_at=job.updated_at
             )
         
-        # Look up server in config registry
-        registry = settings.server_registry
-        
-        if server not in registry:
-            raise HTTPException(status_code=400, detail=f"Unknown server: {server}. Available: {list(registry.keys())}")
-        
-        server_config = registry[server]
-        server_url = server_config["url"]
-        
-        # Special case: ortools-local uses embedded library
-        if server_url == "embedded":
-            routing_request = RoutingRequest(**request)
-            result = await ortools_client.solve(routing_request)
-            return result.dict()
-        
-        # Always request geometry for road-following routes on the map
-        if 'options' not in request:
-            request['options'] = {}
-        if isinstance(request.get('options'), dict):
-            request['options']['g'] = True
-
-        # Build headers (auto-inject API Key for /optimize endpoints)
-        headers = {"Content-Type": "application/json"}
-        api_key = server_config.get("api_key")
-        if api_key:
-            headers["X-API-Key"] = api_key
-
-        # Generic HTTP proxy for all other servers
-        print(f"Sending request to {server} at {server_url}...")
-        print(f"Jobs count: {len(request.get('jobs', []))}")
-        print(f"Vehicles count: {len(request.get('vehicles', []))}")
-        if api_key:
-            print(f"API Key: {api_key[:10]}...")
+        # Look up the server's engine (loaded on first use)
+        try:
+            engine = engine_registry.get(server)
+        except UnknownEngineError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                server_url,
-                json=request,
-                timeout=float(timeout),
-                headers=headers,
+        # Sync solves never queue behind async jobs, only the tenant's quota applies
+        with fair_share.sync_slot(tenant, server_tier(server)):
+            result = await run_until_disconnect(
+                raw_request, engine.solve_raw(request, deadline), timeout
             )
-            print(f"Response status: {response.status_code}")
-            response.raise_for_status()
-            result = response.json()
-            print(f"Response received successfully")
-            return result
+        print(f"Response received successfully")
+        if analysis:
+            with timer.phase("analysis"):
+                result["plan_analysis"] = await asyncio.to_thread(analyze_solution, result, request)
+        with timer.phase("encode"):
+            return Response(content=dumps_bytes(result), media_type="application/json")
         
+    except HTTPException:
+        raise
+    except ClientDisconnectedError:
+        print(f"Client disconnected, cancelled solve on {server}")
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except NoHealthyReplicaError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Engine did not answer within the {timeout}s deadline",
+        )
     except httpx.HTTPStatusError as e:
         error_msg = f"Engine Error ({e.response.status_code}): {e.response.text}"
         print(f"=== ENGINE ERROR ===")
@@ -145,38 +293,145 @@ async def solve_routing_problem(
 
 
 @app.get("/job/{job_id}")
-async def get_job_status(job_id: str) -> JobResponse:
-    job = job_manager.get_job(job_id)
+async def get_job_status(
+    job_id: str,
+    raw_request: Request,
+    profile: bool = Query(False, description="Return the job's stored sampling profile; admin only")
+) -> JobResponse:
+    timer: RequestTimer = raw_request.state.timer
+    if profile:
+        require_admin(raw_request)
+    tenant = authenticate(raw_request)
+
+    with timer.phase("lookup"):
+        job = await get_tenant_job(job_id, tenant)
+
+    if profile:
+        if job.profile is None:
+            raise HTTPException(status_code=404, detail="No profile stored for this job")
+        return PlainTextResponse(job.profile)
+    
+    with timer.phase("encode"):
+        # The stored result is already plain JSON, so only the envelope is dumped
+        content = JobResponse(
+            id=job.id,
+            status=job.status,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            error=job.error,
+            metadata=job.metadata
+        ).model_dump(mode="json")
+        content["result"] = job.result
+        content["plan_analysis"] = job.plan_analysis
+        return Response(content=dumps_bytes(content), media_type="application/json")
+
+
+@app.get("/job/{job_id}/analysis")
+async def get_job_analysis(job_id: str, raw_request: Request):
+    """Returns plan KPIs for a completed job, computed on first request and cached."""
+    timer: RequestTimer = raw_request.state.timer
+    tenant = authenticate(raw_request)
+    with timer.phase("lookup"):
+        job = await get_tenant_job(job_id, tenant)
+    if job.status != JobStatus.COMPLETED or job.result is None:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}, not completed")
+
+    cached = job.plan_analysis is not None
+    with timer.phase("analysis"):
+        result = await job_manager.get_analysis(job)
+    with timer.phase("encode"):
+        return Response(
+            content=dumps_bytes(result),
+            media_type="application/json",
+            headers={"X-Analysis-Cache": "hit" if cached else "miss"},
+        )
+
+
+@app.get("/job/{job_id}/features")
+async def get_job_features(
+    job_id: str,
+    raw_request: Request,
+    bbox: str = Query(..., description="Viewport as min_lng,min_lat,max_lng,max_lat"),
+    zoom: Optional[int] = Query(None, ge=0, le=24, description="Map zoom; thins route geometry to about a pixel"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500, description="Routes per page"),
+):
+    """Returns the routes and steps of a completed job that intersect a viewport."""
+    timer: RequestTimer = raw_request.state.timer
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+    if min_lng > max_lng or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox minimum exceeds its maximum")
+    tenant = authenticate(raw_request)
+
+    with timer.phase("lookup"):
+        # Status and owner only; the result is loaded if the index is not cached
+        summary = await job_manager.get_job_summary(job_id)
+    check_owner(summary, tenant)
+    if summary.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {summary.status.value}, not completed")
+
+    with timer.phase("index"):
+        index = await job_manager.get_spatial_index(job_id)
+    if index is None:
+        raise HTTPException(status_code=409, detail="Job completed without a result")
+    with timer.phase("query"):
+        features = index.features((min_lng, min_lat, max_lng, max_lat), zoom, page, page_size)
+    with timer.phase("encode"):
+        return Response(content=dumps_bytes(features), media_type="application/json")
+
+
+@app.delete("/job/{job_id}")
+async def cancel_job(job_id: str, raw_request: Request) -> JobResponse:
+    await get_tenant_job(job_id, authenticate(raw_request))
+    job = await job_manager.cancel_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    
+    if job.status != JobStatus.CANCELLED:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+
     return JobResponse(
         id=job.id,
         status=job.status,
         created_at=job.created_at,
         updated_at=job.updated_at,
-        result=job.result,
         error=job.error
     )
 
 
 @app.post("/map-matching/match")
-async def match_trajectory(request: MapMatchingRequest) -> MapMatchingResponse:
+async def match_trajectory(
+    request: MapMatchingRequest,
+    raw_request: Request,
+    profile: bool = Query(False, description="Return a sampling profile instead of the result; admin only")
+) -> MapMatchingResponse:
     """GPS 궤적을 도로 네트워크에 매칭하여 보정된 경로를 반환합니다."""
+    timer: RequestTimer = raw_request.state.timer
+    timer.mark("parse")
+
+    if profile:
+        require_admin(raw_request)
+        return await run_profiled(match_trajectory(request, raw_request, profile=False))
+    authorize(raw_request)
+
     try:
         print(f"\n=== DEBUG: Map Matching request ===")
         print(f"Trajectory points: {len(request.trajectory)}")
         
         # 외부 Map Matching 서비스 호출 (configurable via MAP_MATCHING_URL env var)
         async with httpx.AsyncClient() as client:
-            response = await client.post(
-                settings.map_matching_url,
-                json={"trajectory": request.trajectory},
-                timeout=30.0,
-                headers={"Content-Type": "application/json"}
-            )
+            with timer.phase("upstream"):
+                response = await client.post(
+                    settings.map_matching_url,
+                    json={"trajectory": request.trajectory},
+                    timeout=30.0,
+                    headers={"Content-Type": "application/json"}
+                )
             response.raise_for_status()
-            result = response.json()
+            with timer.phase("decode"):
+                result = response.json()
             
             print(f"Map Matching response received successfully")
             
@@ -203,12 +458,15 @@ async def match_trajectory(request: MapMatchingRequest) -> MapMatchingResponse:
                     shape_preservation_score=summary_data.get("shape_preservation_score", 0.0)
                 )
             
-            return MapMatchingResponse(
+            match_response = MapMatchingResponse(
                 success=result.get("success", True),
                 message=result.get("message", "Map matching completed successfully"),
                 matched_trace=matched_points,
                 summary=summary
             )
+            timer.mark("convert")
+            with timer.phase("encode"):
+                return JSONResponse(content=match_response.model_dump(mode="json"))
             
     except Exception as e:
         print(f"=== Map Matching ERROR ===")
@@ -229,9 +487,41 @@ async def match_trajectory(request: MapMatchingRequest) -> MapMatchingResponse:
 
 @app.get("/servers")
 async def get_available_servers():
-    """Returns all backend-proxied servers from config."""
-    servers = [
-        {"name": name, "description": info["description"], "url": info["url"]}
-        for name, info in settings.server_registry.items()
-    ]
-    return {"servers": servers}
\ No newline at end of file
+    """Returns all backend-proxied servers from config with live replica health."""
+    servers = []
+    for name, info in settings.server_registry.items():
+        if info["engine"] != "http":
+            replicas = []
+            status = "up"
+        else:
+            replicas = engine_balancer.status(info)
+            health = [r["healthy"] for r in replicas]
+            if any(r["healthy"] and r["circuit"] != "open" for r in replicas):
+                status = "up"
+            elif all(h is False for h in health):
+                status = "down"
+            else:
+                status = "unknown"
+        servers.append({
+            "name": name,
+            "description": info.get("description", ""),
+            "url": info["url"],
+            "status": status,
+            "replicas": replicas,
+        })
+    return {"servers": servers}
+
+
+@app.get("/usage")
+async def get_usage(raw_request: Request):
+    """Returns the caller's usage counters, or every tenant's with X-Admin-Key."""
+    admin_key = raw_request.headers.get("X-Admin-Key", "")
+    if settings.admin_api_key and secrets.compare_digest(admin_key, settings.admin_api_key):
+        return fair_share.snapshot()
+    return authenticate(raw_request).to_dict()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Returns process-local counters for this worker."""
+    return metrics.snapshot()
@@ -1,18 +1,44 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from ..models.request import RoutingRequest
 from ..models.response import RoutingResponse
+from ..utils.deadline import Deadline
+from ..utils.timing import phase
 
 
 class RoutingEngine(ABC):
     """Base class for routing engines"""
+
+    # Coordinate order of step locations in solve_raw results
+    location_order = "latlng"
+
+    @classmethod
+    def from_config(cls, server_config: Dict[str, Any]) -> "RoutingEngine":
+        """Build an engine for a server registry entry"""
+        return cls()
     
     @abstractmethod
-    async def solve(self, request: RoutingRequest) -> RoutingResponse:
-        """Solve routing problem and return response"""
+    async def solve(self, request: RoutingRequest, time_limit: Optional[float] = None) -> RoutingResponse:
+        """Solve routing problem and return response.
+
+        ``time_limit`` is the solver time budget in seconds, if any.
+        """
         pass
+
+    async def solve_raw(self, request: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        """Solve a raw /solve request body and return the JSON result.
+
+        Engines that speak the VROOM wire format natively override this to
+        skip the round trip through the pydantic models.
+        """
+        with phase("validate"):
+            routing_request = RoutingRequest(**request)
+        with phase("solve"):
+            result = await self.solve(routing_request, deadline.solver_budget())
+        with phase("dump"):
+            return result.model_dump()
     
     @abstractmethod
     def get_engine_name(self) -> str:
         """Return engine name"""
-        pass
\ No newline at end of file
+        pass
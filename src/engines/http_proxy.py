@@ -0,0 +1,65 @@
+from typing import Any, Dict, Optional
+from .normalize import loads_bytes
+from .vroom_client import VroomClient
+from ..models.request import RoutingRequest
+from ..models.response import RoutingResponse
+from ..services.load_balancer import engine_balancer
+from ..utils.deadline import Deadline
+from ..utils.timing import phase
+
+
+class HttpProxyEngine(VroomClient):
+    """Forwards VROOM-format requests to a registry entry's replicas."""
+
+    # Results are passed through in VROOM format
+    location_order = "lnglat"
+
+    def __init__(self, server_config: Dict[str, Any]):
+        super().__init__(base_url=server_config["url"])
+        self.server_config = server_config
+
+    @classmethod
+    def from_config(cls, server_config: Dict[str, Any]) -> "HttpProxyEngine":
+        return cls(server_config)
+
+    def get_engine_name(self) -> str:
+        return "HTTP proxy"
+
+    async def solve(self, request: RoutingRequest, time_limit: Optional[float] = None) -> RoutingResponse:
+        deadline = Deadline(time_limit if time_limit is not None else 300)
+        result = await self.solve_raw(self._convert_to_vroom_format(request), deadline)
+        return self._convert_from_vroom_format(result)
+
+    async def solve_raw(self, request: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        # Always request geometry for road-following routes on the map
+        request = request.copy()
+        if 'options' not in request:
+            request['options'] = {}
+        if isinstance(request.get('options'), dict):
+            request['options'] = {**request['options'], 'g': True}
+
+        # Build headers (auto-inject API Key for /optimize endpoints)
+        headers = {"Content-Type": "application/json"}
+        api_key = self.server_config.get("api_key")
+        if api_key:
+            headers["X-API-Key"] = api_key
+
+        print(f"Sending request to {self.server_config['url']} "
+              f"({len(self.server_config['urls'])} replicas)...")
+        print(f"Jobs count: {len(request.get('jobs', []))}")
+        print(f"Vehicles count: {len(request.get('vehicles', []))}")
+        if api_key:
+            print(f"API Key: {api_key[:10]}...")
+
+        with phase("upstream"):
+            response = await engine_balancer.post(
+                self.server_config,
+                json=request,
+                timeout=deadline.timeout,
+                headers=headers,
+                deadline=deadline,
+            )
+        print(f"Response status: {response.status_code}")
+        response.raise_for_status()
+        with phase("decode"):
+            return loads_bytes(response.content)
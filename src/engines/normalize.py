@@ -0,0 +1,79 @@
+"""Low-overhead normalization of engine output into the RoutingResponse shape.
+
+Engine output we produce or proxy ourselves is trusted, so it is converted
+as plain dicts without pydantic validation, reusing the engine's step dicts,
+and encoded straight to bytes. Callers that need the typed models validate
+the normalized dict once with ``RoutingResponse.model_validate``.
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encodes a JSON-compatible object to bytes (orjson if installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def loads_bytes(data: bytes) -> Any:
+    """Decodes a JSON body (orjson if installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def swap_coordinates(steps: Iterable[Dict[str, Any]]) -> None:
+    """Turns the [lng, lat] step locations into [lat, lng] in place."""
+    for step in steps:
+        location = step.get("location")
+        if location:
+            step["location"] = location[1::-1]
+
+
+def steps_from_columns(
+    types: Iterable[str],
+    locations: Iterable[List[float]],
+    jobs: Iterable[Optional[int]],
+    arrivals: Iterable[Optional[int]],
+    durations: Iterable[Optional[int]],
+) -> List[Dict[str, Any]]:
+    """Builds Step-shaped dicts from per-field columns."""
+    return [
+        {"type": t, "location": loc, "job": job, "arrival": arrival, "duration": duration}
+        for t, loc, job, arrival, duration in zip(types, locations, jobs, arrivals, durations)
+    ]
+
+
+def normalize_vroom_response(vroom_response: Dict[str, Any], engine: str) -> Dict[str, Any]:
+    """Converts a decoded VROOM-format solution into the RoutingResponse shape.
+
+    Steps are reused rather than copied: only their locations are swapped.
+    Extra VROOM step fields are kept.
+    """
+    routes = vroom_response.get("routes", [])
+    for route in routes:
+        swap_coordinates(route["steps"])
+    return {
+        "code": vroom_response.get("code", 0),
+        "summary": vroom_response.get("summary", {}),
+        "unassigned": vroom_response.get("unassigned", []),
+        "routes": [
+            {
+                "vehicle": route["vehicle"],
+                "cost": route["cost"],
+                "steps": route["steps"],
+                "geometry": route.get("geometry"),
+            }
+            for route in routes
+        ],
+        "engine": engine,
+        "partial": bool(vroom_response.get("partial", False)),
+    }
@@ -1,39 +1,131 @@
+import asyncio
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from .base import RoutingEngine
+from .normalize import steps_from_columns
 from ..models.request import RoutingRequest, Location
-from ..models.response import RoutingResponse, Route, Step, Summary
+from ..models.response import RoutingResponse, Summary
+from ..utils.config import settings
+from ..utils.deadline import Deadline
+from ..utils.timing import phase, record_phase
+
+
+def _mp_context():
+    # fork() from the threaded server could copy locks held by other threads
+    # into the child. The forkserver forks from its own single-threaded
+    # process instead; it preloads the app modules loaded so far, so that
+    # re-running the main module in each child costs next to nothing.
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    package = __name__.split(".")[0]
+    context.set_forkserver_preload(sorted(
+        name for name in sys.modules if name.split(".")[0] == package
+    ))
+    return context
+
+
+_MP_CONTEXT = _mp_context()
+# Each solve blocks a thread on its pipe until the child answers. They get
+# their own pool, one thread per solve slot, so they never starve the
+# default executor behind asyncio.to_thread (job store, analysis, indexes).
+_SOLVE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.max_concurrent_solves, thread_name_prefix="ortools-solve"
+)
+
+
+def _solve_worker(client: "OrToolsClient", request: RoutingRequest,
+                  deadline: Optional[Deadline], conn) -> None:
+    """Runs one solve in a child process and sends the response dict back."""
+    try:
+        solution = client._solve_vrp(request, deadline)
+        start = time.perf_counter()
+        response = client._convert_to_response_format(solution, request)
+        solution["timings"]["convert"] = time.perf_counter() - start
+        conn.send({"response": response, "timings": solution["timings"]})
+    except Exception as e:
+        conn.send(e)
+    finally:
+        conn.close()
 
 
 class OrToolsClient(RoutingEngine):
     def __init__(self):
         pass
         
-    async def solve(self, request: RoutingRequest) -> RoutingResponse:
+    async def solve(self, request: RoutingRequest, time_limit: Optional[float] = None) -> RoutingResponse:
+        # time_limit is the solver budget, the deadline adds the transport margin
+        deadline = None if time_limit is None else Deadline(time_limit + settings.deadline_margin_min)
+        return RoutingResponse.model_validate(await self._solve_dict(request, deadline))
+
+    async def solve_raw(self, request: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        # Our own output is trusted, so the response dict is not re-validated
+        with phase("validate"):
+            routing_request = RoutingRequest(**request)
+        with phase("solve"):
+            return await self._solve_dict(routing_request, deadline)
+
+    async def _solve_dict(self, request: RoutingRequest, deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """Solves in a child process so a cancelled solve can be terminated.
+
+        With a ``deadline`` the child sizes the search once its distance
+        matrix is built, stops it at the solver budget left by then and
+        returns its best solution flagged as ``partial``. The child is only
+        killed if it has not answered when the deadline itself expires.
+        """
+        parent_conn, child_conn = _MP_CONTEXT.Pipe(duplex=False)
+        process = _MP_CONTEXT.Process(
+            target=_solve_worker, args=(self, request, deadline, child_conn), daemon=True
+        )
+        process.start()
+        child_conn.close()
         try:
-            solution = self._solve_vrp(request)
-            return self._convert_to_response_format(solution, request)
-        except Exception as e:
-            return RoutingResponse(
-                code=1,
-                summary=Summary(
-                    cost=0, unassigned=len(request.jobs), delivery=[0], 
-                    amount=[0], pickup=[0], service=0, duration=0, 
-                    waiting_time=0, priority=0
-                ),
-                unassigned=[{"id": j.id, "location": [j.location.lat, j.location.lng]} for j in request.jobs],
-                routes=[],
-                engine="OR-Tools"
+            result = await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(_SOLVE_EXECUTOR, parent_conn.recv),
+                None if deadline is None else deadline.remaining(),
             )
+            if isinstance(result, Exception):
+                raise result
+            for name, seconds in result["timings"].items():
+                record_phase(f"ortools_{name}", seconds)
+            return result["response"]
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return self._error_response(request)
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=1.0)
+            parent_conn.close()
+
+    def _error_response(self, request: RoutingRequest) -> Dict[str, Any]:
+        return RoutingResponse(
+            code=1,
+            summary=Summary(
+                cost=0, unassigned=len(request.jobs), delivery=[0], 
+                amount=[0], pickup=[0], service=0, duration=0, 
+                waiting_time=0, priority=0
+            ),
+            unassigned=[{"id": j.id, "location": [j.location.lat, j.location.lng]} for j in request.jobs],
+            routes=[],
+            engine="OR-Tools"
+        ).model_dump()
     
     def get_engine_name(self) -> str:
         return "OR-Tools"
     
-    def _solve_vrp(self, request: RoutingRequest) -> Dict[str, Any]:
+    def _solve_vrp(self, request: RoutingRequest, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        start = time.perf_counter()
         locations = self._extract_locations(request)
         distance_matrix = self._create_distance_matrix(locations)
+        matrix_time = time.perf_counter() - start
         
         num_vehicles = len(request.vehicles)
         manager = pywrapcp.RoutingIndexManager(
@@ -57,15 +149,27 @@ class OrToolsClient(RoutingEngine):
         search_parameters.first_solution_strategy = (
             routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
         )
+        if deadline is not None:
+            # Monotonic time is system-wide, so the parent's deadline holds
+            # here; the matrix build above already used part of it
+            search_parameters.time_limit.FromMilliseconds(int(deadline.solver_budget() * 1000))
         
+        start = time.perf_counter()
         solution = routing.SolveWithParameters(search_parameters)
+        search_time = time.perf_counter() - start
         
         return {
             "manager": manager,
             "routing": routing,
             "solution": solution,
             "locations": locations,
-            "distance_matrix": distance_matrix
+            "distance_matrix": distance_matrix,
+            # Time limit hit before local search converged
+            "partial": routing.status() == (
+                routing_enums_pb2.RoutingSearchStatus
+                .ROUTING_PARTIAL_SUCCESS_LOCAL_OPTIMUM_NOT_REACHED
+            ),
+            "timings": {"matrix": matrix_time, "search": search_time},
         }
     
     def _extract_locations(self, request: RoutingRequest) -> List[Location]:
@@ -94,90 +198,71 @@ class OrToolsClient(RoutingEngine):
             matrix.append(row)
         return matrix
     
-    def _convert_to_response_format(self, solution_data: Dict[str, Any], request: RoutingRequest) -> RoutingResponse:
+    def _convert_to_response_format(self, solution_data: Dict[str, Any], request: RoutingRequest) -> Dict[str, Any]:
+        """Builds the RoutingResponse-shaped dict, steps column by column."""
         manager = solution_data["manager"]
         routing = solution_data["routing"]
         solution = solution_data["solution"]
         locations = solution_data["locations"]
         
         if not solution:
-            return RoutingResponse(
-                code=1,
-                summary=Summary(
-                    cost=0, unassigned=len(request.jobs), delivery=[0], 
-                    amount=[0], pickup=[0], service=0, duration=0, 
-                    waiting_time=0, priority=0
-                ),
-                unassigned=[{"id": j.id, "location": [j.location.lat, j.location.lng]} for j in request.jobs],
-                routes=[],
-                engine="OR-Tools"
-            )
-        
+            return self._error_response(request)
+
+        coords = [[loc.lat, loc.lng] for loc in locations]
         routes = []
         total_cost = 0
         
         for vehicle_id in range(len(request.vehicles)):
             index = routing.Start(vehicle_id)
-            route_steps = []
+            # Job nodes visited and the cumulative cost on arrival at each
+            nodes = []
+            arrivals = []
             route_cost = 0
             
-            # Add start step
-            location_index = manager.IndexToNode(index)
-            route_steps.append(Step(
-                type="start",
-                location=[locations[location_index].lat, locations[location_index].lng],
-                arrival=0,
-                duration=0
-            ))
-            
             while not routing.IsEnd(index):
                 previous_index = index
                 index = solution.Value(routing.NextVar(index))
-                location_index = manager.IndexToNode(index)
-                
                 if not routing.IsEnd(index):
-                    # This is a job location
-                    job_id = location_index  # Job index (minus 1 for depot offset)
-                    route_steps.append(Step(
-                        type="job",
-                        location=[locations[location_index].lat, locations[location_index].lng],
-                        job=job_id,
-                        arrival=route_cost,
-                        duration=300  # Default service time
-                    ))
-                
+                    # Job node (node index == job index + 1 for depot offset)
+                    nodes.append(manager.IndexToNode(index))
+                    arrivals.append(route_cost)
                 route_cost += routing.GetArcCostForVehicle(previous_index, index, vehicle_id)
             
-            # Add end step
-            route_steps.append(Step(
-                type="end",
-                location=[locations[0].lat, locations[0].lng],  # Back to depot
-                arrival=route_cost,
-                duration=0
-            ))
-            
-            if len(route_steps) > 2:  # Has actual jobs
-                routes.append(Route(
-                    vehicle=vehicle_id,
-                    cost=route_cost,
-                    steps=route_steps
-                ))
-                total_cost += route_cost
+            if not nodes:  # No actual jobs
+                continue
+
+            start_node = manager.IndexToNode(routing.Start(vehicle_id))
+            count = len(nodes)
+            routes.append({
+                "vehicle": vehicle_id,
+                "cost": route_cost,
+                "steps": steps_from_columns(
+                    types=["start"] + ["job"] * count + ["end"],
+                    locations=[coords[start_node]] + [coords[n] for n in nodes] + [coords[0]],
+                    jobs=[None] + nodes + [None],
+                    arrivals=[0] + arrivals + [route_cost],
+                    durations=[0] + [300] * count + [0],  # Default service time
+                ),
+                "geometry": None,
+            })
+            total_cost += route_cost
         
-        return RoutingResponse(
-            code=0,
-            summary=Summary(
-                cost=total_cost,
-                unassigned=0,
-                delivery=[1],
-                amount=[1],
-                pickup=[0],
-                service=len(request.jobs) * 300,
-                duration=total_cost,
-                waiting_time=0,
-                priority=100
-            ),
-            unassigned=[],
-            routes=routes,
-            engine="OR-Tools"
-        )
\ No newline at end of file
+        return {
+            "code": 0,
+            "summary": {
+                "cost": total_cost,
+                "unassigned": 0,
+                "delivery": [1],
+                "amount": [1],
+                "pickup": [0],
+                "service": len(request.jobs) * 300,
+                "duration": total_cost,
+                "waiting_time": 0,
+                "priority": 100,
+                "distance": None,
+            },
+            "unassigned": [],
+            "routes": routes,
+            "engine": "OR-Tools",
+            "partial": solution_data.get("partial", False),
+        }
@@ -0,0 +1,72 @@
+import importlib
+from importlib.metadata import entry_points
+from typing import Dict, Tuple, Type
+from .base import RoutingEngine
+from ..utils.config import settings
+
+
+# Built-in engine types as (module, class). Modules are imported on first
+# use, so nodes that only proxy never load ortools/numpy.
+BUILTIN_ENGINES: Dict[str, Tuple[str, str]] = {
+    "http": (".http_proxy", "HttpProxyEngine"),
+    "ortools": (".ortools_client", "OrToolsClient"),
+    "vroom": (".vroom_client", "VroomClient"),
+    "roouty": (".roouty_client", "RoutyClient"),
+}
+
+# Third-party engines register under this entry point group and are
+# referenced as "entrypoint:<name>" in a registry entry's "engine"
+ENTRY_POINT_GROUP = "route_playground.engines"
+
+
+class UnknownEngineError(ValueError):
+    """Raised for unknown servers or engine types."""
+
+
+def load_engine_class(engine_type: str) -> Type[RoutingEngine]:
+    if engine_type.startswith("entrypoint:"):
+        name = engine_type.split(":", 1)[1]
+        matches = [ep for ep in entry_points(group=ENTRY_POINT_GROUP) if ep.name == name]
+        if not matches:
+            raise UnknownEngineError(
+                f"No '{ENTRY_POINT_GROUP}' entry point named '{name}' is installed"
+            )
+        engine_cls = matches[0].load()
+    elif engine_type in BUILTIN_ENGINES:
+        module_name, class_name = BUILTIN_ENGINES[engine_type]
+        module = importlib.import_module(module_name, package=__package__)
+        engine_cls = getattr(module, class_name)
+    else:
+        raise UnknownEngineError(f"Unknown engine type: {engine_type}")
+
+    if not (isinstance(engine_cls, type) and issubclass(engine_cls, RoutingEngine)):
+        raise UnknownEngineError(f"{engine_type} does not provide a RoutingEngine")
+    return engine_cls
+
+
+class EngineRegistry:
+    """Creates the engine of each server registry entry lazily and caches it.
+
+    One instance is shared by the API and the job manager.
+    """
+
+    def __init__(self):
+        self.engines: Dict[str, RoutingEngine] = {}
+
+    def get(self, server: str) -> RoutingEngine:
+        registry = settings.server_registry
+        if server not in registry:
+            raise UnknownEngineError(
+                f"Unknown server: {server}. Available: {list(registry.keys())}"
+            )
+        server_config = registry[server]
+        # Rebuild when the registry entry changed (e.g. settings reloaded)
+        key = f"{server}:{server_config['engine']}:{','.join(server_config['urls'])}"
+        if key not in self.engines:
+            engine_cls = load_engine_class(server_config["engine"])
+            self.engines[key] = engine_cls.from_config(server_config)
+        return self.engines[key]
+
+
+# Global engine registry instance
+engine_registry = EngineRegistry()
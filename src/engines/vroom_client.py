@@ -1,27 +1,51 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base import RoutingEngine
 from ..models.request import RoutingRequest
 from ..models.response import RoutingResponse
+from ..utils.config import settings
+from ..utils.deadline import Deadline
+from ..utils.timing import phase
+from .normalize import normalize_vroom_response
 
 
 class VroomClient(RoutingEngine):
     def __init__(self, base_url: str = "http://localhost:3000"):
         self.base_url = base_url
+
+    @classmethod
+    def from_config(cls, server_config: Dict[str, Any]) -> "RoutingEngine":
+        return cls(base_url=server_config["url"])
         
-    async def solve(self, request: RoutingRequest) -> RoutingResponse:
+    async def solve(self, request: RoutingRequest, time_limit: Optional[float] = None) -> RoutingResponse:
         vroom_request = self._convert_to_vroom_format(request)
+        vroom_response = await self._post(vroom_request, time_limit)
+        return self._convert_from_vroom_format(vroom_response)
+
+    async def solve_raw(self, request: Dict[str, Any], deadline: Deadline) -> Dict[str, Any]:
+        # The engine's output is trusted, so it is normalized without re-validation
+        with phase("validate"):
+            vroom_request = self._convert_to_vroom_format(RoutingRequest(**request))
+        with phase("solve"):
+            vroom_response = await self._post(vroom_request, deadline.solver_budget())
+        with phase("normalize"):
+            return normalize_vroom_response(vroom_response, "VROOM")
+
+    async def _post(self, vroom_request: Dict[str, Any], time_limit: Optional[float]) -> Dict[str, Any]:
+        headers = {}
+        if time_limit is not None:
+            headers[settings.solver_time_hint_header] = f"{time_limit:.1f}"
         
         async with httpx.AsyncClient() as client:
             response = await client.post(
                 f"{self.base_url}/",
                 json=vroom_request,
-                timeout=30.0
+                timeout=30.0 if time_limit is None else time_limit + settings.deadline_margin_min,
+                headers=headers
             )
             response.raise_for_status()
             
-        vroom_response = response.json()
-        return self._convert_from_vroom_format(vroom_response)
+        return response.json()
     
     def get_engine_name(self) -> str:
         return "VROOM"
@@ -56,27 +80,6 @@ class VroomClient(RoutingEngine):
         }
     
     def _convert_from_vroom_format(self, vroom_response: Dict[str, Any]) -> RoutingResponse:
-        return RoutingResponse(
-            code=vroom_response.get("code", 0),
-            summary=vroom_response.get("summary", {}),
-            unassigned=vroom_response.get("unassigned", []),
-            routes=[
-                {
-                    "vehicle": route["vehicle"],
-                    "cost": route["cost"],
-                    "steps": [
-                        {
-                            "type": step["type"],
-                            "location": [step["location"][1], step["location"][0]],  # Convert lng,lat to lat,lng
-                            "job": step.get("job"),
-                            "arrival": step.get("arrival"),
-                            "duration": step.get("duration")
-                        }
-                        for step in route["steps"]
-                    ],
-                    "geometry": route.get("geometry")
-                }
-                for route in vroom_response.get("routes", [])
-            ],
-            engine="VROOM"
-        )
\ No newline at end of file
+        return RoutingResponse.model_validate(
+            normalize_vroom_response(vroom_response, "VROOM")
+        )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 from enum import Enum
 import uuid
@@ -10,6 +10,7 @@ class JobStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class AsyncJob(BaseModel):
@@ -19,21 +20,68 @@ class AsyncJob(BaseModel):
     updated_at: datetime
     server: str
     request_data: Dict[str, Any]
+    timeout: int = 300
+    # Tenant of the submitting API key, for fair queuing and quotas
+    tenant: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    # Phase timings (ms) and profiling flags
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    # Folded-stack profile, only with ?profile=1
+    profile: Optional[str] = None
+    # Plan KPIs, computed on first request and cached. Not "analysis", which
+    # the VROOM wrapper already uses in its results for its quality report
+    plan_analysis: Optional[Dict[str, Any]] = None
+    # Lease of the worker that last claimed the job, and how many claims it took
+    lease_id: Optional[str] = None
+    attempts: int = 0
 
     @classmethod
-    def create(cls, server: str, request_data: Dict[str, Any]) -> "AsyncJob":
+    def create(
+        cls, server: str, request_data: Dict[str, Any], timeout: int = 300,
+        profile: bool = False, tenant: Optional[str] = None, analysis: bool = False
+    ) -> "AsyncJob":
         now = datetime.utcnow()
+        metadata = {}
+        if profile:
+            metadata["profile_requested"] = True
+        if analysis:
+            metadata["analysis_requested"] = True
         return cls(
             id=str(uuid.uuid4()),
             status=JobStatus.PENDING,
             created_at=now,
             updated_at=now,
             server=server,
-            request_data=request_data
+            request_data=request_data,
+            timeout=timeout,
+            tenant=tenant,
+            metadata=metadata
         )
 
+    def mark(self, status: JobStatus):
+        self.status = status
+        self.updated_at = datetime.utcnow()
+
+
+class PendingJob(BaseModel):
+    """A queued job as the scheduler sees it, without its request payload."""
+    id: str
+    server: str
+    tenant: Optional[str] = None
+    created_at: datetime
+
+
+class JobSummary(BaseModel):
+    """A job's status and owner, without its request and result payloads."""
+    id: str
+    server: str
+    status: JobStatus
+    tenant: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
 
 class JobResponse(BaseModel):
     id: str
@@ -41,4 +89,6 @@ class JobResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     result: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    plan_analysis: Optional[Dict[str, Any]] = None
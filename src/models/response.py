@@ -35,4 +35,6 @@ class RoutingResponse(BaseModel):
     summary: Summary
     unassigned: List[Dict[str, Any]]
     routes: List[Route]
-    engine: str
\ No newline at end of file
+    engine: str
+    # True when the solver stopped at its deadline with its best solution so far
+    partial: bool = False
\ No newline at end of file
@@ -0,0 +1,188 @@
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+STOP_TYPES = ("job", "pickup", "delivery")
+PERCENTILES = (50, 90, 95)
+ORTOOLS_ENGINE = "OR-Tools"
+
+
+def _number(value: Any) -> Optional[float]:
+    """Converts a numpy scalar to a JSON number, NaN to None."""
+    value = float(value)
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else round(value, 4)
+
+
+def _capacities(request: Optional[Dict[str, Any]]) -> Dict[Any, List[float]]:
+    capacities = {}
+    for vehicle in (request or {}).get("vehicles") or []:
+        capacity = vehicle.get("capacity")
+        if capacity is not None:
+            capacities[vehicle.get("id")] = capacity if isinstance(capacity, list) else [capacity]
+    return capacities
+
+
+def _vehicle_ids(routes: List[Dict[str, Any]], ortools: bool, request: Optional[Dict[str, Any]]) -> List[Any]:
+    """Request vehicle id of each route.
+
+    VROOM reports the id; OR-Tools numbers routes by the vehicle's position
+    in the request.
+    """
+    vehicles = (request or {}).get("vehicles") or []
+    ids = []
+    for route in routes:
+        vehicle = route.get("vehicle")
+        if ortools and isinstance(vehicle, int) and 0 <= vehicle < len(vehicles):
+            vehicle = vehicles[vehicle].get("id", vehicle)
+        ids.append(vehicle)
+    return ids
+
+
+def _fleet_stats(np, values) -> Optional[Dict[str, Any]]:
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return None
+    stats = {"min": values.min(), "max": values.max(), "mean": values.mean(), "total": values.sum()}
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f"p{q}"] = value
+    return {k: _number(v) for k, v in stats.items()}
+
+
+def _unassigned_breakdown(result: Dict[str, Any], request: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    unassigned = result.get("unassigned") or []
+    priorities = {job.get("id"): job.get("priority", 0) for job in (request or {}).get("jobs") or []}
+    return {
+        "count": len(unassigned),
+        "by_type": dict(Counter(item.get("type", "job") for item in unassigned)),
+        "by_priority": {
+            str(priority): count
+            for priority, count in sorted(Counter(
+                priorities.get(item.get("id"), 0) for item in unassigned
+            ).items())
+        },
+        "ids": [item.get("id") for item in unassigned],
+    }
+
+
+def analyze_solution(result: Dict[str, Any], request: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Computes plan KPIs from a solve result.
+
+    Step fields are gathered into numpy columns and reduced per route. Works
+    on both raw VROOM output (cumulative step ``distance`` and ``duration``,
+    per-step ``service``, ``waiting_time`` and ``load``) and the normalized
+    RoutingResponse shape, where missing fields count as 0 or unknown.
+    Route-level totals from the engine win over the step sums.
+
+    OR-Tools results only carry arc costs, which are metres: their distance
+    is the route cost, and duration, span, service and waiting time are None.
+    ``request`` supplies vehicle ids, capacities and job priorities.
+    """
+    # numpy is only needed here, so it is not loaded until the first analysis
+    import numpy as np
+
+    routes = [route for route in result.get("routes") or [] if route.get("steps")]
+    ortools = result.get("engine") == ORTOOLS_ENGINE
+    vehicle_ids = _vehicle_ids(routes, ortools, request)
+    steps = [step for route in routes for step in route["steps"]]
+    counts = np.fromiter((len(route["steps"]) for route in routes), dtype=np.int64, count=len(routes))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    ends = starts + counts - 1
+
+    def step_column(name: str, default: float):
+        return np.fromiter(
+            (default if step.get(name) is None else step[name] for step in steps),
+            dtype=float, count=len(steps),
+        )
+
+    def route_column(name: str):
+        return np.fromiter(
+            (math.nan if route.get(name) is None else route[name] for route in routes),
+            dtype=float, count=len(routes),
+        )
+
+    def per_route(route_values, step_values):
+        return np.where(np.isnan(route_values), step_values, route_values)
+
+    vehicles = []
+    if routes:
+        arrival = step_column("arrival", math.nan)
+        is_stop = np.fromiter(
+            (step.get("type") in STOP_TYPES for step in steps), dtype=bool, count=len(steps)
+        )
+        # Cumulative on the last step, summed otherwise
+        distance = per_route(route_column("distance"), step_column("distance", math.nan)[ends])
+        duration = per_route(route_column("duration"), step_column("duration", math.nan)[ends])
+        service = per_route(route_column("service"), np.add.reduceat(step_column("service", 0), starts))
+        waiting = per_route(
+            route_column("waiting_time"), np.add.reduceat(step_column("waiting_time", 0), starts)
+        )
+        stops = np.add.reduceat(is_stop.astype(np.int64), starts)
+        span = arrival[ends] - arrival[starts]
+        if ortools:
+            # Step arrivals are cumulative costs and step durations the default service time
+            distance = route_column("cost")
+            duration = span = service = waiting = np.full(len(routes), math.nan)
+
+        # Loads padded to a steps x dimensions matrix; capacities likewise per route
+        capacity_by_vehicle = _capacities(request)
+        dims = max(
+            [len(step.get("load") or []) for step in steps]
+            + [len(c) for c in capacity_by_vehicle.values()]
+            + [1]
+        )
+        loads = np.full((len(steps), dims), math.nan)
+        for i, step in enumerate(steps):
+            load = step.get("load")
+            if load:
+                loads[i, :len(load)] = load
+        capacity = np.full((len(routes), dims), math.nan)
+        for i, vehicle in enumerate(vehicle_ids):
+            vehicle_capacity = capacity_by_vehicle.get(vehicle)
+            if vehicle_capacity:
+                capacity[i, :len(vehicle_capacity)] = vehicle_capacity
+        with np.errstate(invalid="ignore", divide="ignore"):
+            max_load = np.fmax.reduceat(loads, starts, axis=0)
+            ratio = np.where(capacity > 0, max_load / capacity, math.nan)
+            # Fullest dimension of each vehicle
+            utilization = np.fmax.reduce(ratio, axis=1)
+
+        for i, vehicle in enumerate(vehicle_ids):
+            vehicles.append({
+                "vehicle": vehicle,
+                "stops": int(stops[i]),
+                "distance": _number(distance[i]),
+                "duration": _number(duration[i]),
+                "span": _number(span[i]),
+                "service": _number(service[i]),
+                "waiting_time": _number(waiting[i]),
+                "max_load": [_number(v) for v in max_load[i]],
+                "capacity": [_number(v) for v in capacity[i]],
+                "utilization": _number(utilization[i]),
+            })
+        metrics = {
+            "stops": stops.astype(float),
+            "distance": distance,
+            "duration": duration,
+            "span": span,
+            "service": service,
+            "waiting_time": waiting,
+            "utilization": utilization,
+        }
+    else:
+        metrics = {}
+
+    used = [v for v in vehicles if v["stops"] > 0]
+    return {
+        "vehicles": vehicles,
+        "fleet": {
+            "vehicles_total": len((request or {}).get("vehicles") or []) or len(routes),
+            "vehicles_used": len(used),
+            "stops": sum(v["stops"] for v in vehicles),
+            "unassigned": len(result.get("unassigned") or []),
+            "percentiles": {name: _fleet_stats(np, values) for name, values in metrics.items()},
+        },
+        "unassigned": _unassigned_breakdown(result, request),
+    }
@@ -0,0 +1,252 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from ..models.job import AsyncJob, PendingJob
+from ..utils.config import settings
+
+
+ANONYMOUS_TENANT = "anonymous"
+
+
+class UnknownApiKeyError(Exception):
+    """Raised when client keys are configured and the caller's key is not one of them."""
+
+
+class RateLimitedError(Exception):
+    """Raised when a tenant's token bucket is empty."""
+
+    def __init__(self, tenant: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for '{tenant}', retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class QuotaExceededError(Exception):
+    """Raised when a tenant already runs its quota of solves on an engine tier."""
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``burst``; a rate of 0 is unlimited."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def acquire(self) -> float:
+        """Takes one token; returns 0, or the seconds until one is available."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Tenant:
+    """A client of the playground, identified by its API key."""
+
+    def __init__(self, name: str, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.name = name
+        self.weight = float(config.get("weight", settings.default_weight))
+        self.bucket = TokenBucket(
+            float(config.get("rate", settings.default_rate_limit)),
+            int(config.get("burst", settings.default_rate_burst)),
+        )
+        self.concurrency: Dict[str, int] = {
+            **settings.default_concurrency, **config.get("concurrency", {})
+        }
+        # Solves running in this worker, per engine tier
+        self.running: Dict[str, int] = {}
+        self.usage: Dict[str, float] = {
+            "requests": 0,
+            "rate_limited": 0,
+            "quota_rejected": 0,
+            "sync_solves": 0,
+            "async_jobs_submitted": 0,
+            "async_jobs_started": 0,
+            "solver_seconds": 0.0,
+        }
+
+    def count(self, name: str, value: float = 1):
+        self.usage[name] = self.usage.get(name, 0) + value
+
+    def has_slot(self, tier: str) -> bool:
+        # Tiers without a quota are unlimited
+        limit = self.concurrency.get(tier)
+        return limit is None or self.running.get(tier, 0) < limit
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tenant": self.name,
+            "weight": self.weight,
+            "rate": self.bucket.rate,
+            "burst": self.bucket.burst,
+            "concurrency": self.concurrency,
+            "running": self.running,
+            **{k: round(v, 3) for k, v in self.usage.items()},
+        }
+
+
+class FairShare:
+    """Per-tenant admission control and fair scheduling of async jobs.
+
+    Every solve takes a token from its tenant's bucket and a slot from the
+    tenant's quota on the engine tier. Sync solves start right away when
+    admitted; async jobs wait in the job store and are started by
+    start-time fair queuing: the pending job of the tenant with the lowest
+    virtual start time goes first, and each start advances that tenant's
+    virtual time by the job's size divided by its weight. Async jobs only
+    use the solve slots that sync solves leave free.
+
+    All state is local to this worker, like ``metrics``.
+    """
+
+    def __init__(self):
+        self.tenants: Dict[str, Tenant] = {}
+        self.sync_running = 0
+        self.async_running = 0
+        self.virtual_clock = 0.0
+        self.finish_tags: Dict[str, float] = {}
+
+    def _keys(self) -> Dict[str, Dict[str, Any]]:
+        return settings.client_api_keys
+
+    def tenant(self, name: str, config: Optional[Dict[str, Any]] = None) -> Tenant:
+        if name not in self.tenants:
+            if config is None:
+                config = next(
+                    (c for key, c in self._keys().items() if tenant_name(key, c) == name), None
+                )
+            self.tenants[name] = Tenant(name, config)
+        return self.tenants[name]
+
+    def resolve(self, api_key: Optional[str]) -> Tenant:
+        """Returns the caller's tenant.
+
+        Without configured client keys every caller shares the anonymous
+        tenant, so existing deployments keep working.
+        """
+        keys = self._keys()
+        if not keys:
+            return self.tenant(ANONYMOUS_TENANT)
+        config = keys.get(api_key or "")
+        if config is None:
+            raise UnknownApiKeyError("Missing or unknown API key")
+        return self.tenant(tenant_name(api_key, config), config)
+
+    def admit(self, tenant: Tenant):
+        """Counts a request and applies the tenant's rate limit."""
+        tenant.count("requests")
+        retry_after = tenant.bucket.acquire()
+        if retry_after:
+            tenant.count("rate_limited")
+            raise RateLimitedError(tenant.name, retry_after)
+
+    @contextmanager
+    def sync_slot(self, tenant: Tenant, tier: str) -> Iterator[None]:
+        """Holds one of the tenant's slots on ``tier`` for a sync solve."""
+        if not tenant.has_slot(tier):
+            tenant.count("quota_rejected")
+            raise QuotaExceededError(
+                f"'{tenant.name}' already runs {tenant.concurrency[tier]} "
+                f"{tier} solves"
+            )
+        tenant.count("sync_solves")
+        self._acquire(tenant, tier)
+        self.sync_running += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.sync_running -= 1
+            self._release(tenant, tier, time.monotonic() - started)
+
+    def async_capacity(self) -> int:
+        """Solve slots async jobs may use now without crowding out sync solves."""
+        reserved = max(settings.sync_reserved_solves, self.sync_running)
+        return settings.max_concurrent_solves - reserved - self.async_running
+
+    def pick(self, heads: Iterable[PendingJob], tier_of: Callable[[str], str]) -> Optional[PendingJob]:
+        """Chooses the next async job to start among the heads of the pending queues.
+
+        ``heads`` holds the oldest pending job of each tenant and server; a
+        tenant's candidate is its oldest head with a free quota slot.
+        """
+        candidates: Dict[str, PendingJob] = {}
+        for head in sorted(heads, key=lambda h: h.created_at):
+            name = head.tenant or ANONYMOUS_TENANT
+            if name not in candidates and self.tenant(name).has_slot(tier_of(head.server)):
+                candidates[name] = head
+        if not candidates:
+            return None
+        return min(
+            candidates.values(),
+            key=lambda head: (self._start_tag(head.tenant or ANONYMOUS_TENANT), head.created_at),
+        )
+
+    def _start_tag(self, name: str) -> float:
+        # A tenant that was idle does not bank credit from the past
+        return max(self.finish_tags.get(name, 0.0), self.virtual_clock)
+
+    def start_async(self, job: AsyncJob, tier: str) -> Tenant:
+        """Charges a started job to its tenant and takes its quota slot."""
+        tenant = self.tenant(job.tenant or ANONYMOUS_TENANT)
+        start = self._start_tag(tenant.name)
+        self.virtual_clock = start
+        self.finish_tags[tenant.name] = start + job_cost(job) / tenant.weight
+        tenant.count("async_jobs_started")
+        self._acquire(tenant, tier)
+        self.async_running += 1
+        return tenant
+
+    def finish_async(self, tenant: Tenant, tier: str, elapsed: float):
+        self.async_running -= 1
+        self._release(tenant, tier, elapsed)
+
+    def _acquire(self, tenant: Tenant, tier: str):
+        tenant.running[tier] = tenant.running.get(tier, 0) + 1
+
+    def _release(self, tenant: Tenant, tier: str, elapsed: float):
+        tenant.running[tier] -= 1
+        tenant.count("solver_seconds", elapsed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sync_running": self.sync_running,
+            "async_running": self.async_running,
+            "tenants": [t.to_dict() for t in self.tenants.values()],
+        }
+
+
+def tenant_name(api_key: str, config: Dict[str, Any]) -> str:
+    """Name of a key's tenant: its "tenant" field, else a digest of the key.
+
+    The name is stored on jobs and listed in /usage, so it is never the key itself.
+    """
+    name = config.get("tenant")
+    if name:
+        return name
+    return "key-" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def job_cost(job: AsyncJob) -> float:
+    """Size of a job for fair queuing: its number of jobs and shipments."""
+    data = job.request_data
+    size = len(data.get("jobs") or []) + len(data.get("shipments") or [])
+    return float(max(1, size))
+
+
+def server_tier(server: str) -> str:
+    """Engine tier of a registry entry, which selects the quota that applies."""
+    info = settings.server_registry.get(server)
+    return info.get("tier", "basic") if info else "basic"
+
+
+# Global fair-share scheduler instance
+fair_share = FairShare()
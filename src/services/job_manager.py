@@ -1,81 +1,298 @@
 import asyncio
-from datetime import datetime
-from typing import Dict, Optional
-from ..models.job import AsyncJob, JobStatus
-from ..engines.ortools_client import OrToolsClient
-from ..models.request import RoutingRequest
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+from ..models.job import AsyncJob, JobStatus, JobSummary
+from ..engines.registry import engine_registry
 from ..utils.config import settings
-import httpx
+from ..utils.deadline import Deadline
+from .analysis import analyze_solution
+from .fair_share import Tenant, fair_share, server_tier
+from .job_store import JobStore, InMemoryJobStore, create_job_store
+from .spatial_index import SpatialIndex
+from .metrics import metrics
+from ..utils.profiler import SamplingProfiler
+from ..utils.timing import RequestTimer
+
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.PROCESSING)
 
 
 class JobManager:
-    def __init__(self):
-        self.jobs: Dict[str, AsyncJob] = {}
-        self.ortools_client = OrToolsClient()
+    def __init__(self, store: Optional[JobStore] = None):
+        self.store = store or create_job_store()
+        self._worker_task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._running_jobs: Dict[str, asyncio.Task] = {}
+        # Jobs this worker holds a lease on, renewed by the dispatch loop
+        self._claimed: Dict[str, AsyncJob] = {}
+        # Running jobs aborted by the worker itself rather than by a user
+        self._abandoned: Set[str] = set()
+        self._last_renewal = 0.0
+        self._last_purge = 0.0
+        # Created in start(): on Python < 3.10 an Event binds to the loop current
+        # at construction, and this instance is built at import time
+        self._wakeup: Optional[asyncio.Event] = None
+        # Most recently used spatial indexes of completed jobs, by job id
+        self._indexes: "OrderedDict[str, SpatialIndex]" = OrderedDict()
+        self._indexes_bytes = 0
 
-    def create_job(self, server: str, request_data: dict) -> AsyncJob:
-        job = AsyncJob.create(server, request_data)
-        self.jobs[job.id] = job
+    async def create_job(
+        self, server: str, request_data: dict, timeout: int = 300, profile: bool = False,
+        tenant: Optional[str] = None, analysis: bool = False
+    ) -> AsyncJob:
+        job = AsyncJob.create(server, request_data, timeout, profile, tenant, analysis)
+        await self.store.create(job)
+        self._wake()
         return job
 
-    def get_job(self, job_id: str) -> Optional[AsyncJob]:
-        return self.jobs.get(job_id)
+    async def get_job(self, job_id: str) -> Optional[AsyncJob]:
+        return await self.store.get(job_id)
+
+    async def get_analysis(self, job: AsyncJob) -> Dict[str, Any]:
+        """Returns a completed job's plan analysis, computing and caching it on first use."""
+        if job.plan_analysis is None:
+            job.plan_analysis = await asyncio.to_thread(
+                analyze_solution, job.result, job.request_data
+            )
+            await self.store.transition(job, [JobStatus.COMPLETED])
+        return job.plan_analysis
 
-    async def process_job(self, job_id: str, timeout: int = 300):
-        job = self.jobs.get(job_id)
-        if not job:
-            return
+    async def get_job_summary(self, job_id: str) -> Optional[JobSummary]:
+        return await self.store.get_summary(job_id)
 
+    async def get_spatial_index(self, job_id: str) -> Optional[SpatialIndex]:
+        """Returns a completed job's spatial index, building it on the first viewport query.
+
+        Only a cache miss loads the job's result; None if it has none.
+        """
+        index = self._indexes.get(job_id)
+        if index is not None:
+            self._indexes.move_to_end(job_id)
+            return index
+        job = await self.store.get(job_id)
+        if job is None or job.result is None:
+            return None
+        return await self._build_index(job)
+
+    async def _build_index(self, job: AsyncJob) -> SpatialIndex:
         try:
-            job.status = JobStatus.PROCESSING
-            job.updated_at = datetime.utcnow()
-            
-            # Look up server URL from config registry
-            registry = settings.server_registry
-            
-            if job.server not in registry:
-                raise ValueError(f"Unknown server: {job.server}")
-            
-            server_config = registry[job.server]
-            server_url = server_config["url"]
-
-            if server_url == "embedded":
-                # OR-Tools: use embedded library
-                routing_request = RoutingRequest(**job.request_data)
-                result = await self.ortools_client.solve(routing_request)
-                job.result = result.dict()
-            else:
-                # Always request geometry for road-following routes
-                request = job.request_data.copy()
-                if 'options' not in request:
-                    request['options'] = {}
-                if isinstance(request.get('options'), dict):
-                    request['options']['g'] = True
-
-                # Build headers (auto-inject API Key)
-                headers = {"Content-Type": "application/json"}
-                api_key = server_config.get("api_key")
-                if api_key:
-                    headers["X-API-Key"] = api_key
-
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        server_url,
-                        json=request,
-                        timeout=float(timeout),
-                        headers=headers,
-                    )
-                    response.raise_for_status()
-                    job.result = response.json()
+            index = await asyncio.to_thread(
+                SpatialIndex,
+                job.result,
+                job.metadata.get("location_order", "lnglat"),
+                settings.spatial_grid_size,
+            )
+        except Exception:
+            logger.exception("Spatial index error for job %s", job.id)
+            raise
+        self._indexes[job.id] = index
+        self._indexes_bytes += index.nbytes
+        # Least recently used indexes go first; the new one stays even if it is larger
+        limit = settings.spatial_index_cache_mb * 1024 * 1024
+        while self._indexes_bytes > limit and len(self._indexes) > 1:
+            _, evicted = self._indexes.popitem(last=False)
+            self._indexes_bytes -= evicted.nbytes
+        return index
+
+    async def cancel_job(self, job_id: str) -> Optional[AsyncJob]:
+        """Marks a job cancelled and aborts its solve if it runs in this worker.
+
+        Jobs running in another worker are aborted by that worker's loop once
+        it sees the cancelled status in the shared store.
+        """
+        job = await self.store.get(job_id)
+        if not job or job.status not in ACTIVE_STATUSES:
+            return job
+        job.mark(JobStatus.CANCELLED)
+        if not await self.store.transition(job, ACTIVE_STATUSES):
+            # Finished or cancelled concurrently
+            return await self.store.get(job_id)
+
+        task = self._running_jobs.get(job_id)
+        if task:
+            task.cancel()
+        else:
+            metrics.inc("jobs_cancelled")
+        return job
+
+    async def _execute(self, job: AsyncJob, tier: str, tenant: Tenant):
+        started = time.monotonic()
+        task = asyncio.create_task(self._run(job, job.timeout))
+        self._running_jobs[job.id] = task
+        try:
+            await asyncio.wait({task})
+        finally:
+            self._running_jobs.pop(job.id, None)
+            self._claimed.pop(job.id, None)
+            self._abandoned.discard(job.id)
+            fair_share.finish_async(tenant, tier, time.monotonic() - started)
+            # A solve slot is free again
+            self._wake()
+
+    async def _run(self, job: AsyncJob, timeout: int):
+        started = time.monotonic()
+        deadline = Deadline(timeout)
+        timer = RequestTimer()
+        token = timer.activate()
+        timer.add("queue", (job.updated_at - job.created_at).total_seconds())
+        profiler = None
+        if job.metadata.get("profile_requested"):
+            profiler = SamplingProfiler()
+            profiler.start()
+
+        try:
+            # Look up the server's engine (loaded on first use)
+            engine = engine_registry.get(job.server)
+            job.result = await engine.solve_raw(job.request_data, deadline)
+            job.metadata["location_order"] = engine.location_order
+            if job.metadata.get("analysis_requested"):
+                await self._analyze(job, timer)
             
             job.status = JobStatus.COMPLETED
             
+        except asyncio.CancelledError:
+            # Cancelling the task aborts the upstream request or OR-Tools process
+            if job.id not in self._abandoned:
+                metrics.record_cancel("jobs_cancelled", time.monotonic() - started, timeout)
+            raise
         except Exception as e:
             job.status = JobStatus.FAILED
             job.error = str(e)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                job.profile = profiler.folded()
+            job.metadata["timings"] = timer.as_dict()
+            timer.deactivate(token)
         
-        job.updated_at = datetime.utcnow()
+        job.mark(job.status)
+        await self.store.transition(job, [JobStatus.PROCESSING])
+
+    async def _analyze(self, job: AsyncJob, timer: RequestTimer):
+        # A failed analysis does not fail the solve; GET /analysis retries it
+        try:
+            with timer.phase("analysis"):
+                job.plan_analysis = await asyncio.to_thread(
+                    analyze_solution, job.result, job.request_data
+                )
+        except Exception as e:
+            job.metadata["analysis_error"] = str(e)
+
+    async def _reap_cancelled(self):
+        """Aborts local solves whose job was cancelled through another worker."""
+        for job_id, task in list(self._running_jobs.items()):
+            job = await self.store.get(job_id)
+            if job and job.status == JobStatus.CANCELLED:
+                task.cancel()
+
+    async def _maintain(self):
+        """Renews this worker's leases, requeues jobs of dead workers and purges old jobs."""
+        now = time.monotonic()
+        if now - self._last_renewal >= settings.job_lease_seconds / 3:
+            self._last_renewal = now
+            for job_id, job in list(self._claimed.items()):
+                if not await self.store.renew(job):
+                    # Requeued after this worker missed its renewals, or cancelled
+                    task = self._running_jobs.get(job_id)
+                    if task and not task.done():
+                        job = await self.store.get(job_id)
+                        if not job or job.status != JobStatus.CANCELLED:
+                            self._abandoned.add(job_id)
+                        task.cancel()
+            reclaimed = await self.store.reclaim_expired()
+            if reclaimed:
+                metrics.inc("jobs_reclaimed", reclaimed)
+        if now - self._last_purge >= settings.job_purge_interval:
+            self._last_purge = now
+            purged = await self.store.purge(datetime.utcnow() - timedelta(seconds=settings.job_ttl))
+            if purged:
+                metrics.inc("jobs_purged", purged)
+
+    async def _dispatch_next(self) -> bool:
+        """Starts the pending job with the best fair-share claim, if a slot is free.
+
+        Returns whether to look again right away.
+        """
+        if fair_share.async_capacity() <= 0:
+            return False
+        tiers: Dict[str, str] = {}
+
+        def tier_of(server: str) -> str:
+            if server not in tiers:
+                tiers[server] = server_tier(server)
+            return tiers[server]
+
+        head = fair_share.pick(await self.store.pending_heads(), tier_of)
+        if head is None:
+            return False
+        # Another worker may already have claimed it from the shared store;
+        # only a job this worker wins is loaded with its payload
+        job = await self.store.claim(head.id)
+        if job:
+            # Take the slot before yielding so the next pick sees it
+            self._claimed[job.id] = job
+            tier = tier_of(job.server)
+            tenant = fair_share.start_async(job, tier)
+            task = asyncio.create_task(self._execute(job, tier, tenant))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        return True
+
+    async def _dispatch_loop(self):
+        """Starts jobs queued by any worker sharing the store, by fair share."""
+        while True:
+            self._wakeup.clear()
+            try:
+                if not isinstance(self.store, InMemoryJobStore):
+                    await self._reap_cancelled()
+                await self._maintain()
+                while await self._dispatch_next():
+                    pass
+            except Exception as e:
+                print(f"Job dispatcher error: {e}")
+            # Not wait_for: on Python < 3.12 it drops a cancel that arrives as
+            # the event is set, and stop() would then wait forever
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=settings.job_poll_interval)
+            finally:
+                waiter.cancel()
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        if self._worker_task is None:
+            self._wakeup = asyncio.Event()
+            self._worker_task = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        """Stops dispatching and hands the jobs still running here back to the queue."""
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+
+        claimed = list(self._claimed.values())
+        self._abandoned.update(job.id for job in claimed)
+        for task in self._running_jobs.values():
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        for job in claimed:
+            # The stored copy, without partial results of the aborted solve
+            stored = await self.store.get(job.id)
+            if stored and stored.lease_id == job.lease_id and await self.store.requeue(stored):
+                metrics.inc("jobs_requeued")
 
 
 # Global job manager instance
-job_manager = JobManager()
\ No newline at end of file
+job_manager = JobManager()
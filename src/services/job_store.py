@@ -0,0 +1,622 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..models.job import AsyncJob, JobStatus, JobSummary, PendingJob
+from ..utils.config import settings
+
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+def _lease(job: AsyncJob) -> AsyncJob:
+    """Marks a claimed job PROCESSING under a fresh lease."""
+    job.mark(JobStatus.PROCESSING)
+    job.lease_id = uuid.uuid4().hex
+    job.attempts += 1
+    return job
+
+
+def _head(job: AsyncJob) -> PendingJob:
+    return PendingJob(id=job.id, server=job.server, tenant=job.tenant, created_at=job.created_at)
+
+
+def _expire(job: AsyncJob) -> AsyncJob:
+    """Requeues a job whose worker let its lease lapse, or fails it for good."""
+    if job.attempts >= settings.job_max_attempts:
+        job.mark(JobStatus.FAILED)
+        job.error = f"Worker lost the job {job.attempts} times"
+    else:
+        job.mark(JobStatus.PENDING)
+    return job
+
+
+class JobStore(ABC):
+    """Base class for job storage backends.
+
+    Claiming is atomic: a pending job moves to PROCESSING for exactly one
+    caller, so any worker sharing the store can pick it up. The claim comes
+    with a lease of ``settings.job_lease_seconds`` that the worker renews
+    while it solves; a PROCESSING job can only be written by the holder of
+    its current lease.
+    """
+
+    @abstractmethod
+    async def create(self, job: AsyncJob) -> None:
+        """Store a new job"""
+        pass
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[AsyncJob]:
+        """Return a job by id"""
+        pass
+
+    @abstractmethod
+    async def get_summary(self, job_id: str) -> Optional[JobSummary]:
+        """Return a job's status, owner and metadata without loading its payloads"""
+        pass
+
+    @abstractmethod
+    async def update(self, job: AsyncJob) -> None:
+        """Persist the current state of a job"""
+        pass
+
+    @abstractmethod
+    async def transition(self, job: AsyncJob, from_statuses: Iterable[JobStatus]) -> bool:
+        """Persist a job only if its stored status is one of from_statuses
+
+        A stored PROCESSING job must also still be leased to ``job.lease_id``.
+        """
+        pass
+
+    @abstractmethod
+    async def claim(self, job_id: str) -> Optional[AsyncJob]:
+        """Move a pending job to PROCESSING under a new lease, or return None if already taken"""
+        pass
+
+    @abstractmethod
+    async def claim_next(self) -> Optional[AsyncJob]:
+        """Claim the oldest pending job, if any"""
+        pass
+
+    @abstractmethod
+    async def pending_heads(self) -> List[PendingJob]:
+        """Return the oldest pending job of each tenant and server, without payloads"""
+        pass
+
+    @abstractmethod
+    async def renew(self, job: AsyncJob) -> bool:
+        """Extend the lease on a job; False if the lease was lost"""
+        pass
+
+    @abstractmethod
+    async def reclaim_expired(self) -> int:
+        """Requeue (or fail) PROCESSING jobs whose lease lapsed; returns how many"""
+        pass
+
+    @abstractmethod
+    async def purge(self, before: datetime) -> int:
+        """Delete finished jobs last updated before ``before``; returns how many"""
+        pass
+
+    async def requeue(self, job: AsyncJob) -> bool:
+        """Hands a job this worker holds back to the queue without using up an attempt."""
+        job.attempts = max(0, job.attempts - 1)
+        job.mark(JobStatus.PENDING)
+        return await self.transition(job, [JobStatus.PROCESSING])
+
+
+def _copy(job: AsyncJob) -> AsyncJob:
+    # The request and result are never modified once stored, so they are
+    # shared; metadata is edited in place and gets its own dict
+    return job.model_copy(update={"metadata": dict(job.metadata)})
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local store. Default single-worker mode and test fake.
+
+    Reads and writes copy only the job's fields, not its request and result
+    payloads, which can be megabytes and are treated as immutable.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, AsyncJob] = {}
+        # Lease expiry (epoch seconds) of each PROCESSING job
+        self.leases: Dict[str, float] = {}
+
+    async def create(self, job: AsyncJob) -> None:
+        self.jobs[job.id] = _copy(job)
+
+    async def get(self, job_id: str) -> Optional[AsyncJob]:
+        job = self.jobs.get(job_id)
+        return _copy(job) if job else None
+
+    async def get_summary(self, job_id: str) -> Optional[JobSummary]:
+        job = self.jobs.get(job_id)
+        if not job:
+            return None
+        return JobSummary(
+            id=job.id, server=job.server, status=job.status, tenant=job.tenant,
+            created_at=job.created_at, updated_at=job.updated_at, metadata=dict(job.metadata),
+        )
+
+    async def update(self, job: AsyncJob) -> None:
+        self.jobs[job.id] = _copy(job)
+        if job.status != JobStatus.PROCESSING:
+            self.leases.pop(job.id, None)
+
+    async def transition(self, job: AsyncJob, from_statuses: Iterable[JobStatus]) -> bool:
+        current = self.jobs.get(job.id)
+        if not current or current.status not in set(from_statuses):
+            return False
+        if current.status == JobStatus.PROCESSING and current.lease_id != job.lease_id:
+            return False
+        await self.update(job)
+        return True
+
+    async def claim(self, job_id: str) -> Optional[AsyncJob]:
+        job = self.jobs.get(job_id)
+        if not job or job.status != JobStatus.PENDING:
+            return None
+        _lease(job)
+        self.leases[job_id] = time.time() + settings.job_lease_seconds
+        return _copy(job)
+
+    async def claim_next(self) -> Optional[AsyncJob]:
+        pending = [j for j in self.jobs.values() if j.status == JobStatus.PENDING]
+        if not pending:
+            return None
+        return await self.claim(min(pending, key=lambda j: j.created_at).id)
+
+    async def pending_heads(self) -> List[PendingJob]:
+        heads: Dict[Tuple[Optional[str], str], AsyncJob] = {}
+        for job in self.jobs.values():
+            if job.status != JobStatus.PENDING:
+                continue
+            head = heads.get((job.tenant, job.server))
+            if head is None or job.created_at < head.created_at:
+                heads[(job.tenant, job.server)] = job
+        return [_head(job) for job in heads.values()]
+
+    async def renew(self, job: AsyncJob) -> bool:
+        current = self.jobs.get(job.id)
+        if not current or current.status != JobStatus.PROCESSING or current.lease_id != job.lease_id:
+            return False
+        self.leases[job.id] = time.time() + settings.job_lease_seconds
+        return True
+
+    async def reclaim_expired(self) -> int:
+        now = time.time()
+        reclaimed = 0
+        for job_id, expires in list(self.leases.items()):
+            if expires > now:
+                continue
+            job = _expire(await self.get(job_id))
+            if await self.transition(job, [JobStatus.PROCESSING]):
+                reclaimed += 1
+        return reclaimed
+
+    async def purge(self, before: datetime) -> int:
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.status in FINISHED_STATUSES and job.updated_at < before
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """SQLite store in WAL mode, shared by all workers on one host.
+
+    Status, tenant, server, metadata, lease and update time are kept in
+    their own columns, so the scheduler, status summaries, lease renewals and
+    expiry never touch the job payload.
+    """
+
+    COLUMNS = {
+        "tenant": "TEXT",
+        "server": "TEXT",
+        "metadata": "TEXT",
+        "lease_id": "TEXT",
+        "lease_expires": "REAL",
+        "updated_at": "TEXT",
+    }
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "created_at TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            # Databases from before these columns get them, filled from the payload
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, sql_type in self.COLUMNS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+            if "server" not in existing:
+                conn.execute(
+                    "UPDATE jobs SET tenant = json_extract(data, '$.tenant'), "
+                    "server = json_extract(data, '$.server')"
+                )
+            if "metadata" not in existing:
+                conn.execute("UPDATE jobs SET metadata = json_extract(data, '$.metadata')")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_pending "
+                "ON jobs (status, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_queues "
+                "ON jobs (status, tenant, server, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_updated "
+                "ON jobs (status, updated_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, conn: sqlite3.Connection, job: AsyncJob) -> None:
+        # Leases are only set by claims and renewals
+        conn.execute(
+            "INSERT INTO jobs (id, status, created_at, data, updated_at, tenant, server, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET status = excluded.status, "
+            "data = excluded.data, updated_at = excluded.updated_at, metadata = excluded.metadata",
+            (job.id, job.status.value, job.created_at.isoformat(),
+             job.model_dump_json(), job.updated_at.isoformat(), job.tenant, job.server,
+             json.dumps(job.metadata)),
+        )
+
+    def _get(self, job_id: str) -> Optional[AsyncJob]:
+        row = self._connect().execute(
+            "SELECT data FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return AsyncJob.model_validate_json(row[0]) if row else None
+
+    def _get_summary(self, job_id: str) -> Optional[JobSummary]:
+        row = self._connect().execute(
+            "SELECT id, server, status, tenant, created_at, "
+            "COALESCE(updated_at, created_at), metadata "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if not row:
+            return None
+        return JobSummary(
+            id=row[0], server=row[1], status=row[2], tenant=row[3],
+            created_at=datetime.fromisoformat(row[4]), updated_at=datetime.fromisoformat(row[5]),
+            metadata=json.loads(row[6] or "{}"),
+        )
+
+    def _transition(self, job: AsyncJob, from_statuses: Iterable[JobStatus]) -> bool:
+        statuses = [s.value for s in from_statuses]
+        placeholders = ", ".join("?" for _ in statuses)
+        processing = job.status == JobStatus.PROCESSING
+        cursor = self._connect().execute(
+            f"UPDATE jobs SET status = ?, data = ?, updated_at = ?, metadata = ?, "
+            f"lease_id = CASE WHEN ? THEN lease_id END, "
+            f"lease_expires = CASE WHEN ? THEN lease_expires END "
+            f"WHERE id = ? AND status IN ({placeholders}) "
+            f"AND (status != ? OR lease_id IS ?)",
+            (job.status.value, job.model_dump_json(), job.updated_at.isoformat(),
+             json.dumps(job.metadata), processing, processing, job.id, *statuses,
+             JobStatus.PROCESSING.value, job.lease_id),
+        )
+        return cursor.rowcount > 0
+
+    def _claim(self, job_id: Optional[str]) -> Optional[AsyncJob]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if job_id is None:
+                row = conn.execute(
+                    "SELECT data FROM jobs WHERE status = ? "
+                    "ORDER BY created_at LIMIT 1",
+                    (JobStatus.PENDING.value,),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT data FROM jobs WHERE id = ? AND status = ?",
+                    (job_id, JobStatus.PENDING.value),
+                ).fetchone()
+            if not row:
+                conn.execute("COMMIT")
+                return None
+            job = _lease(AsyncJob.model_validate_json(row[0]))
+            conn.execute(
+                "UPDATE jobs SET status = ?, data = ?, updated_at = ?, metadata = ?, "
+                "lease_id = ?, lease_expires = ? WHERE id = ?",
+                (job.status.value, job.model_dump_json(), job.updated_at.isoformat(),
+                 json.dumps(job.metadata), job.lease_id, time.time() + settings.job_lease_seconds, job.id),
+            )
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _pending_heads(self) -> List[PendingJob]:
+        # SQLite takes the other columns from the row that has the MIN()
+        rows = self._connect().execute(
+            "SELECT id, server, tenant, MIN(created_at) FROM jobs "
+            "WHERE status = ? GROUP BY tenant, server",
+            (JobStatus.PENDING.value,),
+        ).fetchall()
+        return [
+            PendingJob(id=row[0], server=row[1], tenant=row[2],
+                       created_at=datetime.fromisoformat(row[3]))
+            for row in rows
+        ]
+
+    def _renew(self, job: AsyncJob) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET lease_expires = ? "
+            "WHERE id = ? AND status = ? AND lease_id = ?",
+            (time.time() + settings.job_lease_seconds, job.id,
+             JobStatus.PROCESSING.value, job.lease_id),
+        )
+        return cursor.rowcount > 0
+
+    def _reclaim_expired(self) -> int:
+        # Rows from before leases have none and count as expired
+        rows = self._connect().execute(
+            "SELECT data FROM jobs WHERE status = ? "
+            "AND (lease_expires IS NULL OR lease_expires < ?)",
+            (JobStatus.PROCESSING.value, time.time()),
+        ).fetchall()
+        return sum(
+            self._transition(_expire(AsyncJob.model_validate_json(row[0])), [JobStatus.PROCESSING])
+            for row in rows
+        )
+
+    def _purge(self, before: datetime) -> int:
+        statuses = [s.value for s in FINISHED_STATUSES]
+        placeholders = ", ".join("?" for _ in statuses)
+        cursor = self._connect().execute(
+            f"DELETE FROM jobs WHERE status IN ({placeholders}) "
+            f"AND COALESCE(updated_at, created_at) < ?",
+            (*statuses, before.isoformat()),
+        )
+        return cursor.rowcount
+
+    def _save(self, job: AsyncJob) -> None:
+        self._write(self._connect(), job)
+
+    async def create(self, job: AsyncJob) -> None:
+        await asyncio.to_thread(self._save, job)
+
+    async def get(self, job_id: str) -> Optional[AsyncJob]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def get_summary(self, job_id: str) -> Optional[JobSummary]:
+        return await asyncio.to_thread(self._get_summary, job_id)
+
+    async def update(self, job: AsyncJob) -> None:
+        await asyncio.to_thread(self._save, job)
+
+    async def transition(self, job: AsyncJob, from_statuses: Iterable[JobStatus]) -> bool:
+        return await asyncio.to_thread(self._transition, job, list(from_statuses))
+
+    async def claim(self, job_id: str) -> Optional[AsyncJob]:
+        return await asyncio.to_thread(self._claim, job_id)
+
+    async def claim_next(self) -> Optional[AsyncJob]:
+        return await asyncio.to_thread(self._claim, None)
+
+    async def pending_heads(self) -> List[PendingJob]:
+        return await asyncio.to_thread(self._pending_heads)
+
+    async def renew(self, job: AsyncJob) -> bool:
+        return await asyncio.to_thread(self._renew, job)
+
+    async def reclaim_expired(self) -> int:
+        return await asyncio.to_thread(self._reclaim_expired)
+
+    async def purge(self, before: datetime) -> int:
+        return await asyncio.to_thread(self._purge, before)
+
+
+class RedisJobStore(JobStore):
+    """Redis-compatible store for workers spread across hosts.
+
+    Requires the optional ``redis`` package. Pending jobs wait in one sorted
+    set per tenant and server, scored by creation time. Leases are keys that
+    expire on their own. Job keys of queued and running jobs never expire;
+    a job's key gets its TTL when the job finishes.
+    """
+
+    # Extends a lease only if it still belongs to the caller
+    RENEW_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+    QUEUE_PREFIX = "route-playground:jobs:pending:"
+
+    def __init__(self, url: str, ttl: int):
+        try:
+            import redis.asyncio as redis
+            from redis.exceptions import WatchError
+        except ImportError as e:
+            raise RuntimeError(
+                "JOB_BACKEND=redis requires the 'redis' package (pip install redis)"
+            ) from e
+        self.redis = redis.from_url(url, decode_responses=True)
+        self.WatchError = WatchError
+        self.ttl = ttl
+        self.queues_key = "route-playground:jobs:queues"
+        self.processing_key = "route-playground:jobs:processing"
+
+    def _key(self, job_id: str) -> str:
+        return f"route-playground:job:{job_id}"
+
+    def _queue_key(self, job: AsyncJob) -> str:
+        return f"{self.QUEUE_PREFIX}{job.tenant or ''}:{job.server}"
+
+    @staticmethod
+    def _score(created_at: datetime) -> float:
+        return created_at.replace(tzinfo=timezone.utc).timestamp()
+
+    def _lease_ms(self) -> int:
+        return int(settings.job_lease_seconds * 1000)
+
+    def _enqueue(self, pipe, job: AsyncJob) -> None:
+        queue = self._queue_key(job)
+        pipe.zadd(queue, {job.id: self._score(job.created_at)})
+        pipe.sadd(self.queues_key, queue)
+
+    async def create(self, job: AsyncJob) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(job.id), job.model_dump_json())
+            self._enqueue(pipe, job)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[AsyncJob]:
+        data = await self.redis.get(self._key(job_id))
+        return AsyncJob.model_validate_json(data) if data else None
+
+    async def get_summary(self, job_id: str) -> Optional[JobSummary]:
+        # The job is one JSON value; validating only the summary fields skips
+        # building the request and result objects
+        data = await self.redis.get(self._key(job_id))
+        return JobSummary.model_validate_json(data) if data else None
+
+    async def update(self, job: AsyncJob) -> None:
+        key = self._key(job.id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, job.model_dump_json(), keepttl=True)
+            pipe.ttl(key)
+            _, ttl = await pipe.execute()
+        if job.status in FINISHED_STATUSES and ttl < 0:
+            await self.redis.expire(key, self.ttl)
+
+    async def transition(self, job: AsyncJob, from_statuses: Iterable[JobStatus]) -> bool:
+        key = self._key(job.id)
+        allowed = set(from_statuses)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                data = await pipe.get(key)
+                if not data:
+                    return False
+                current = AsyncJob.model_validate_json(data)
+                if current.status not in allowed:
+                    return False
+                if current.status == JobStatus.PROCESSING and current.lease_id != job.lease_id:
+                    return False
+                pipe.multi()
+                if job.status not in FINISHED_STATUSES:
+                    pipe.set(key, job.model_dump_json())
+                elif current.status in FINISHED_STATUSES:
+                    # Later writes (a cached analysis) keep the TTL from the finish
+                    pipe.set(key, job.model_dump_json(), keepttl=True)
+                else:
+                    pipe.set(key, job.model_dump_json(), ex=self.ttl)
+                if job.status != JobStatus.PROCESSING:
+                    pipe.delete(f"{key}:lease")
+                    pipe.srem(self.processing_key, job.id)
+                if job.status == JobStatus.PENDING:
+                    # Back in its queue at its original age, claimable again
+                    pipe.delete(f"{key}:claim")
+                    self._enqueue(pipe, job)
+                else:
+                    pipe.zrem(self._queue_key(job), job.id)
+                await pipe.execute()
+                return True
+            except self.WatchError:
+                return False
+
+    async def claim(self, job_id: str) -> Optional[AsyncJob]:
+        # The NX lock makes exactly one worker win the job
+        won = await self.redis.set(
+            f"{self._key(job_id)}:claim", 1, nx=True, ex=self.ttl
+        )
+        if not won:
+            return None
+        job = await self.get(job_id)
+        if not job or job.status != JobStatus.PENDING:
+            return None
+        _lease(job)
+        # The lease exists before the job is PROCESSING, so it never looks expired
+        await self.redis.set(f"{self._key(job_id)}:lease", job.lease_id, px=self._lease_ms())
+        if not await self.transition(job, [JobStatus.PENDING]):
+            await self.redis.delete(f"{self._key(job_id)}:lease")
+            return None
+        await self.redis.sadd(self.processing_key, job_id)
+        return job
+
+    async def claim_next(self) -> Optional[AsyncJob]:
+        for head in sorted(await self.pending_heads(), key=lambda h: h.created_at):
+            job = await self.claim(head.id)
+            if job:
+                return job
+        return None
+
+    async def pending_heads(self) -> List[PendingJob]:
+        heads = []
+        for queue in await self.redis.smembers(self.queues_key):
+            tenant, server = queue[len(self.QUEUE_PREFIX):].rsplit(":", 1)
+            while True:
+                entries = await self.redis.zrange(queue, 0, 0, withscores=True)
+                if not entries:
+                    break
+                job_id, score = entries[0]
+                if await self.redis.exists(self._key(job_id)):
+                    heads.append(PendingJob(
+                        id=job_id, server=server, tenant=tenant or None,
+                        created_at=datetime.fromtimestamp(score, timezone.utc).replace(tzinfo=None),
+                    ))
+                    break
+                # Expired with its TTL while queued
+                await self.redis.zrem(queue, job_id)
+        return heads
+
+    async def renew(self, job: AsyncJob) -> bool:
+        renewed = await self.redis.eval(
+            self.RENEW_SCRIPT, 1, f"{self._key(job.id)}:lease", job.lease_id, self._lease_ms()
+        )
+        return bool(renewed)
+
+    async def reclaim_expired(self) -> int:
+        reclaimed = 0
+        for job_id in await self.redis.smembers(self.processing_key):
+            if await self.redis.exists(f"{self._key(job_id)}:lease"):
+                continue
+            job = await self.get(job_id)
+            if not job or job.status != JobStatus.PROCESSING:
+                await self.redis.srem(self.processing_key, job_id)
+                continue
+            if await self.transition(_expire(job), [JobStatus.PROCESSING]):
+                reclaimed += 1
+        return reclaimed
+
+    async def purge(self, before: datetime) -> int:
+        # Job keys expire after their TTL on their own
+        return 0
+
+
+def create_job_store() -> JobStore:
+    """Builds the job store selected by ``settings.job_backend``."""
+    backend = settings.job_backend.lower()
+    if backend == "memory":
+        return InMemoryJobStore()
+    if backend == "sqlite":
+        return SQLiteJobStore(settings.job_sqlite_path)
+    if backend == "redis":
+        return RedisJobStore(settings.job_redis_url, settings.job_ttl)
+    raise ValueError(f"Unknown job backend: {settings.job_backend}")
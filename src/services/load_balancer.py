@@ -0,0 +1,299 @@
+import asyncio
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+import httpx
+from ..utils.config import settings
+from ..utils.deadline import Deadline
+
+
+# Upstream statuses that mean "this replica is unhealthy", not "bad request"
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+
+class NoHealthyReplicaError(Exception):
+    """Raised when every replica of a server is ejected by its circuit breaker."""
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+def health_url(replica_url: str, health_path: Optional[str]) -> Optional[str]:
+    """Health endpoint on a replica's origin, e.g. http://vroom-wrapper:8000/health.
+
+    Solve URLs only accept POST, so they are never probed themselves. An
+    empty ``health_path`` turns probing off for the replica.
+    """
+    if not health_path or not replica_url.startswith("http"):
+        return None
+    parts = urlsplit(replica_url)
+    return f"{parts.scheme}://{parts.netloc}{health_path}"
+
+
+class Replica:
+    """Live state of one upstream engine URL."""
+
+    def __init__(self, url: str, health_url: Optional[str] = None):
+        self.url = url
+        self.health_url = health_url
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.healthy: Optional[bool] = None
+        self.last_checked: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.total_requests = 0
+        self.total_failures = 0
+
+    @property
+    def circuit(self) -> CircuitState:
+        if self.opened_at is None:
+            return CircuitState.CLOSED
+        if time.monotonic() - self.opened_at >= settings.circuit_reset_timeout:
+            return CircuitState.HALF_OPEN
+        return CircuitState.OPEN
+
+    def is_available(self) -> bool:
+        state = self.circuit
+        if state == CircuitState.CLOSED:
+            return True
+        # Half-open: let a single trial request through
+        return state == CircuitState.HALF_OPEN and self.outstanding == 0
+
+    def record_success(self, latency: Optional[float] = None):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.healthy = True
+        self.last_error = None
+        if latency is not None:
+            alpha = settings.latency_ewma_alpha
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = alpha * latency + (1 - alpha) * self.ewma_latency
+
+    def record_failure(self, error: str):
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        self.last_error = error
+        if (
+            self.circuit == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= settings.circuit_failure_threshold
+        ):
+            self.opened_at = time.monotonic()
+            self.healthy = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "circuit": self.circuit.value,
+            "outstanding": self.outstanding,
+            "latency_ms": (
+                round(self.ewma_latency * 1000, 1)
+                if self.ewma_latency is not None else None
+            ),
+            "last_checked": self.last_checked.isoformat() if self.last_checked else None,
+            "last_error": self.last_error,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+        }
+
+
+class EngineBalancer:
+    """Balances solves across the replicas of each registry entry.
+
+    Replicas are picked by least outstanding requests with the EWMA latency
+    as tiebreak. Failing replicas are ejected by a per-replica circuit
+    breaker, and a background task probes every replica periodically.
+    """
+
+    def __init__(self):
+        self.replicas: Dict[str, Replica] = {}
+        self.client: Optional[httpx.AsyncClient] = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient()
+        return self.client
+
+    def get_replicas(self, server_config: dict) -> List[Replica]:
+        replicas = []
+        health_path = server_config.get("health_path", settings.health_probe_path)
+        for url in server_config["urls"]:
+            if url not in self.replicas:
+                self.replicas[url] = Replica(url, health_url(url, health_path))
+            replicas.append(self.replicas[url])
+        return replicas
+
+    def pick(self, server_config: dict, exclude: Optional[set] = None) -> Optional[Replica]:
+        candidates = [
+            r for r in self.get_replicas(server_config)
+            if r.is_available() and r.url not in (exclude or set())
+        ]
+        if not candidates:
+            return None
+        return min(
+            candidates,
+            key=lambda r: (
+                r.outstanding,
+                r.ewma_latency if r.ewma_latency is not None else 0.0,
+            ),
+        )
+
+    async def post(
+        self,
+        server_config: dict,
+        json: Any,
+        headers: Dict[str, str],
+        timeout: float,
+        deadline: Optional[Deadline] = None,
+    ) -> httpx.Response:
+        """POST to the best replica, retrying on another one if it is unreachable.
+
+        Solves are idempotent, so connection failures, connect timeouts and
+        gateway errors count against the replica and are retried on a
+        different one. Connecting gets at most ``engine_connect_timeout``, so
+        an unreachable replica cannot eat the whole budget. Other timeouts are
+        not retried since the budget is spent, and say nothing about the
+        replica's health. With a ``deadline`` each attempt only gets the time
+        left and tells the engine its solver budget.
+        """
+        tried: set = set()
+        last_error: Optional[Exception] = None
+
+        for _ in range(max(1, settings.solve_max_attempts)):
+            if deadline is not None:
+                if deadline.expired():
+                    break
+                timeout = deadline.remaining()
+                headers = {
+                    **headers,
+                    settings.solver_time_hint_header: f"{deadline.solver_budget():.1f}",
+                }
+            replica = self.pick(server_config, exclude=tried)
+            if replica is None:
+                break
+            tried.add(replica.url)
+
+            replica.outstanding += 1
+            replica.total_requests += 1
+            started = time.monotonic()
+            try:
+                response = await self._get_client().post(
+                    replica.url,
+                    json=json,
+                    timeout=httpx.Timeout(
+                        timeout, connect=min(settings.engine_connect_timeout, timeout)
+                    ),
+                    headers=headers,
+                )
+            except httpx.ConnectTimeout as e:
+                replica.record_failure(f"Connect timeout: {e}")
+                last_error = e
+                continue
+            except httpx.TimeoutException:
+                raise
+            except httpx.TransportError as e:
+                replica.record_failure(f"{type(e).__name__}: {e}")
+                last_error = e
+                continue
+            finally:
+                replica.outstanding -= 1
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                replica.record_failure(f"HTTP {response.status_code}")
+                last_error = httpx.HTTPStatusError(
+                    f"Engine returned {response.status_code}",
+                    request=response.request,
+                    response=response,
+                )
+                continue
+
+            replica.record_success(time.monotonic() - started)
+            return response
+
+        if isinstance(last_error, httpx.HTTPStatusError):
+            return last_error.response
+        if last_error is not None:
+            raise last_error
+        if deadline is not None and deadline.expired():
+            raise httpx.TimeoutException("Deadline exceeded before the engine was called")
+        raise NoHealthyReplicaError(
+            f"No healthy replica available among {server_config['urls']}"
+        )
+
+    async def probe(self, url: str, replicas: List[Replica]):
+        """Checks a health endpoint and updates the replicas behind it.
+
+        Only a 2xx answer counts as up.
+        """
+        error: Optional[str] = None
+        try:
+            response = await self._get_client().get(
+                url, timeout=settings.health_probe_timeout
+            )
+            if not response.is_success:
+                error = f"Probe HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            error = f"Probe {type(e).__name__}: {e}"
+
+        for replica in replicas:
+            if error is not None:
+                replica.record_failure(error)
+                replica.healthy = False
+            elif replica.circuit != CircuitState.OPEN:
+                replica.record_success()
+            else:
+                replica.healthy = True
+            replica.last_checked = datetime.utcnow()
+
+    async def probe_all(self, registry: Dict[str, dict]):
+        # Entries served by the same engine share one health endpoint
+        by_health_url: Dict[str, Dict[str, Replica]] = {}
+        for server_config in registry.values():
+            for replica in self.get_replicas(server_config):
+                if replica.health_url:
+                    by_health_url.setdefault(replica.health_url, {})[replica.url] = replica
+        await asyncio.gather(*(
+            self.probe(url, list(replicas.values()))
+            for url, replicas in by_health_url.items()
+        ))
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe_all(settings.server_registry)
+            except Exception as e:
+                print(f"Health probe error: {e}")
+            await asyncio.sleep(settings.health_probe_interval)
+
+    def start(self):
+        if self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def status(self, server_config: dict) -> List[Dict[str, Any]]:
+        return [r.to_dict() for r in self.get_replicas(server_config)]
+
+
+# Global engine balancer instance
+engine_balancer = EngineBalancer()
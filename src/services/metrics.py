@@ -0,0 +1,42 @@
+import time
+from typing import Any, Dict
+
+
+class Metrics:
+    """Process-local counters, reported by GET /metrics."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters: Dict[str, float] = {
+            "jobs_cancelled": 0,
+            "sync_solves_disconnected": 0,
+            "solver_seconds_spent_before_cancel": 0.0,
+            "unused_budget_seconds_on_cancel": 0.0,
+            "jobs_reclaimed": 0,
+            "jobs_requeued": 0,
+            "jobs_purged": 0,
+        }
+
+    def inc(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_cancel(self, counter: str, elapsed: float, budget: float):
+        """Counts a cancelled solve.
+
+        The unused part of the solve's timeout budget is only an upper bound
+        on the solver time saved: most solves finish well before their
+        timeout.
+        """
+        self.inc(counter)
+        self.inc("solver_seconds_spent_before_cancel", elapsed)
+        self.inc("unused_budget_seconds_on_cancel", max(0.0, budget - elapsed))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            **{k: round(v, 3) for k, v in self.counters.items()},
+        }
+
+
+# Global metrics instance
+metrics = Metrics()
@@ -0,0 +1,241 @@
+import sys
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+# (min_lng, min_lat, max_lng, max_lat)
+BBox = Tuple[float, float, float, float]
+Point = Tuple[float, float]
+
+# Approximate CPython sizes, for SpatialIndex.nbytes: an (x, y) tuple of
+# floats in a list, a step location list, an (r, s) cell entry in a list, and
+# a cell's dict slot with its key tuple and container
+POINT_BYTES = sys.getsizeof((0.0, 0.0)) + 2 * sys.getsizeof(0.0) + 8
+LOCATION_BYTES = sys.getsizeof([0.0, 0.0]) + 2 * sys.getsizeof(0.0)
+ENTRY_BYTES = sys.getsizeof((0, 0)) + 8
+CELL_BYTES = 2 * sys.getsizeof((0, 0)) + sys.getsizeof(set()) + 16
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[Point]:
+    """Decodes an encoded polyline into (lat, lng) points."""
+    # Varints of both axes in one flat list, then prefix sums per axis
+    values = []
+    result = shift = 0
+    for byte in encoded.encode("ascii"):
+        byte -= 63
+        result |= (byte & 0x1F) << shift
+        if byte < 0x20:
+            values.append(~(result >> 1) if result & 1 else result >> 1)
+            result = shift = 0
+        else:
+            shift += 5
+    factor = 10 ** precision
+    lats = accumulate(values[0::2])
+    lngs = accumulate(values[1::2])
+    return [(lat / factor, lng / factor) for lat, lng in zip(lats, lngs)]
+
+
+def encode_polyline(points: Iterable[Point], precision: int = 5) -> str:
+    """Encodes (lat, lng) points as a polyline."""
+    factor = 10 ** precision
+    chunks = []
+    previous = (0, 0)
+    for lat, lng in points:
+        current = (round(lat * factor), round(lng * factor))
+        for value, last in zip(current, previous):
+            value = value - last
+            value = ~(value << 1) if value < 0 else value << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        previous = current
+    return "".join(chunks)
+
+
+def simplify(points: List[Point], tolerance: float) -> List[Point]:
+    """Drops points closer than ``tolerance`` degrees to the last kept one."""
+    if tolerance <= 0 or len(points) <= 2:
+        return points
+    kept = [points[0]]
+    for point in points[1:-1]:
+        last = kept[-1]
+        if abs(point[0] - last[0]) >= tolerance or abs(point[1] - last[1]) >= tolerance:
+            kept.append(point)
+    kept.append(points[-1])
+    return kept
+
+
+def zoom_tolerance(zoom: Optional[int]) -> float:
+    """Degrees covered by about one pixel of a 256px web-mercator tile at ``zoom``."""
+    if zoom is None:
+        return 0.0
+    return 360.0 / (256 * 2 ** zoom)
+
+
+class SpatialIndex:
+    """Uniform grid over a solution's step locations and route segments.
+
+    Cells hold the steps located in them and the routes whose geometry (or,
+    without geometry, the straight lines between steps) passes through them.
+    A viewport query visits only the cells overlapping the bbox: steps are
+    then filtered exactly, routes at cell granularity.
+    """
+
+    def __init__(self, result: Dict[str, Any], location_order: str = "lnglat", grid_size: int = 128):
+        self.routes: List[Dict[str, Any]] = result.get("routes") or []
+        # Step locations and route polylines as (lng, lat)
+        self.step_points: List[List[Optional[Point]]] = []
+        self.paths: List[List[Point]] = []
+        for route in self.routes:
+            points = []
+            for step in route.get("steps") or []:
+                location = step.get("location")
+                if location and len(location) >= 2:
+                    x, y = location[:2] if location_order == "lnglat" else location[1::-1]
+                    points.append((x, y))
+                else:
+                    points.append(None)
+            self.step_points.append(points)
+            geometry = route.get("geometry")
+            if geometry:
+                self.paths.append([(lng, lat) for lat, lng in decode_polyline(geometry)])
+            else:
+                self.paths.append([p for p in points if p is not None])
+
+        located = [p for points in self.step_points for p in points if p is not None]
+        xs = [p[0] for path in self.paths for p in path] + [p[0] for p in located]
+        ys = [p[1] for path in self.paths for p in path] + [p[1] for p in located]
+        if xs:
+            self.extent: BBox = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            self.extent = (0.0, 0.0, 0.0, 0.0)
+        width = self.extent[2] - self.extent[0]
+        height = self.extent[3] - self.extent[1]
+        self.cell_size = max(width, height) / grid_size or 1e-6
+
+        self.step_cells: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self.route_cells: Dict[Tuple[int, int], Set[int]] = {}
+        for r, points in enumerate(self.step_points):
+            for s, point in enumerate(points):
+                if point is not None:
+                    self.step_cells.setdefault(self._cell(point), []).append((r, s))
+        x0, y0, size = self.extent[0], self.extent[1], self.cell_size
+        for r, path in enumerate(self.paths):
+            # A segment covers the cells spanned by its end points' cells;
+            # most segments are much shorter than a cell, so runs of points
+            # in the same cell are added once
+            cells: Set[Tuple[int, int]] = set()
+            previous = None
+            for x, y in path:
+                cell = (int((x - x0) // size), int((y - y0) // size))
+                if cell == previous:
+                    continue
+                cells.add(cell)
+                if previous is not None and (
+                    abs(cell[0] - previous[0]) > 1 or abs(cell[1] - previous[1]) > 1
+                    or (cell[0] != previous[0] and cell[1] != previous[1])
+                ):
+                    for cx in range(min(cell[0], previous[0]), max(cell[0], previous[0]) + 1):
+                        for cy in range(min(cell[1], previous[1]), max(cell[1], previous[1]) + 1):
+                            cells.add((cx, cy))
+                previous = cell
+            for cell in cells:
+                self.route_cells.setdefault(cell, set()).add(r)
+        self.nbytes = self._estimate_bytes()
+
+    def _estimate_bytes(self) -> int:
+        """Approximate memory held by the index, including the routes it keeps."""
+        routes = sum(
+            sys.getsizeof(route) + len(route.get("geometry") or "")
+            + sum(sys.getsizeof(step) + LOCATION_BYTES for step in route.get("steps") or [])
+            for route in self.routes
+        )
+        points = sum(map(len, self.paths)) + sum(map(len, self.step_points))
+        entries = sum(map(len, self.step_cells.values())) + sum(map(len, self.route_cells.values()))
+        cells = len(self.step_cells) + len(self.route_cells)
+        containers = sum(map(sys.getsizeof, (
+            self.routes, self.paths, self.step_points, self.step_cells, self.route_cells,
+        )))
+        return containers + routes + points * POINT_BYTES + entries * ENTRY_BYTES + cells * CELL_BYTES
+
+    def _cell(self, point: Point) -> Tuple[int, int]:
+        return (
+            int((point[0] - self.extent[0]) // self.cell_size),
+            int((point[1] - self.extent[1]) // self.cell_size),
+        )
+
+    def _cells(self, bbox: BBox) -> Iterable[Tuple[int, int]]:
+        x0, y0 = self._cell((bbox[0], bbox[1]))
+        x1, y1 = self._cell((bbox[2], bbox[3]))
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield x, y
+
+    def _clip(self, bbox: BBox) -> Optional[BBox]:
+        """Intersects a bbox with the indexed extent."""
+        clipped = (
+            max(bbox[0], self.extent[0]), max(bbox[1], self.extent[1]),
+            min(bbox[2], self.extent[2]), min(bbox[3], self.extent[3]),
+        )
+        if clipped[0] > clipped[2] or clipped[1] > clipped[3]:
+            return None
+        return clipped
+
+    def query(self, bbox: BBox) -> Dict[int, List[int]]:
+        """Returns the routes intersecting ``bbox``, mapped to their steps inside it."""
+        clipped = self._clip(bbox)
+        if clipped is None:
+            return {}
+        matches: Dict[int, List[int]] = {}
+        for cell in self._cells(clipped):
+            for r in self.route_cells.get(cell, ()):
+                matches.setdefault(r, [])
+            for r, s in self.step_cells.get(cell, ()):
+                x, y = self.step_points[r][s]
+                if bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]:
+                    matches.setdefault(r, []).append(s)
+        for steps in matches.values():
+            steps.sort()
+        return dict(sorted(matches.items()))
+
+    def features(
+        self, bbox: BBox, zoom: Optional[int] = None, page: int = 1, page_size: int = 50
+    ) -> Dict[str, Any]:
+        """Pages through the routes intersecting ``bbox`` with their visible steps.
+
+        Route geometries are returned whole, thinned to about one point per
+        pixel at ``zoom``, so panning never leaves a route half drawn.
+        """
+        matches = self.query(bbox)
+        route_ids = list(matches)
+        first = (page - 1) * page_size
+        tolerance = zoom_tolerance(zoom)
+
+        routes = []
+        for r in route_ids[first:first + page_size]:
+            route = self.routes[r]
+            steps = route.get("steps") or []
+            geometry = route.get("geometry")
+            if geometry and tolerance:
+                geometry = encode_polyline(
+                    (lat, lng) for lng, lat in simplify(self.paths[r], tolerance)
+                )
+            routes.append({
+                "index": r,
+                "vehicle": route.get("vehicle"),
+                "cost": route.get("cost"),
+                "geometry": geometry,
+                "step_count": len(steps),
+                "steps": [{"index": s, **steps[s]} for s in matches[r]],
+            })
+
+        return {
+            "bbox": list(bbox),
+            "zoom": zoom,
+            "page": page,
+            "page_size": page_size,
+            "total_routes": len(route_ids),
+            "next_page": page + 1 if first + page_size < len(route_ids) else None,
+            "routes": routes,
+        }
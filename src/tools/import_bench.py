@@ -0,0 +1,61 @@
+"""Cold-start import benchmark for the backend.
+
+Each scenario runs in a fresh interpreter and reports the median wall time
+of importing the API, peak RSS, and whether the heavy solver dependencies
+were loaded::
+
+    python -m src.tools.import_bench --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+SNIPPET = """
+import json, resource, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "ortools": "ortools" in sys.modules,
+    "numpy": "numpy" in sys.modules,
+}}))
+"""
+
+SCENARIOS = {
+    "api (proxy only)": "import src.api.routes",
+    "api + ortools engine": (
+        "import src.api.routes\n"
+        "from src.engines.registry import engine_registry\n"
+        "engine_registry.get('ortools-local')"
+    ),
+}
+
+
+def run(code: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(code=code)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, code in SCENARIOS.items():
+        results = [run(code) for _ in range(args.runs)]
+        elapsed = statistics.median(r["elapsed"] for r in results) * 1000
+        rss = statistics.median(r["maxrss_kb"] for r in results) / 1024
+        loaded = [m for m in ("ortools", "numpy") if results[0][m]] or ["-"]
+        print(f"{name:<24} {elapsed:8.1f} ms  {rss:7.1f} MB  loaded: {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    main()
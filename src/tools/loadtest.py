@@ -0,0 +1,323 @@
+"""Open-loop load generator for the /solve proxy layer.
+
+Sends requests at a fixed arrival rate regardless of how fast responses come
+back, so queueing inside the backend shows up as latency instead of being
+hidden by a closed loop. With ``--spawn`` it starts a stub engine and a
+backend pointed at it, which makes runs with different settings comparable
+on one box::
+
+    python -m src.tools.loadtest --spawn --mode sync --rate 20,50 --duration 30
+    python -m src.tools.loadtest --spawn --mode async --rate 20 \\
+        --backend-env API_WORKERS=4 --backend-env JOB_BACKEND=sqlite
+
+Without ``--spawn`` it targets an already running backend (``--target``); pass
+``--backend-pid`` to sample its RSS.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import httpx
+
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+def build_request(jobs: int, vehicles: int) -> Dict[str, Any]:
+    rng = random.Random(42)
+    return {
+        "vehicles": [
+            {"id": v, "profile": "car", "start": [127.0, 37.5], "capacity": [100]}
+            for v in range(vehicles)
+        ],
+        "jobs": [
+            {
+                "id": j,
+                "location": [127.0 + rng.uniform(-0.1, 0.1), 37.5 + rng.uniform(-0.1, 0.1)],
+                "service": 300,
+                "delivery": [1],
+            }
+            for j in range(jobs)
+        ],
+    }
+
+
+def read_rss(pid: int) -> int:
+    """RSS in bytes of a process and all of its descendants (e.g. uvicorn workers)."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(c) for c in f.read().split())
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+    return total
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, rate: float):
+        self.args = args
+        self.rate = rate
+        self.payload = build_request(args.jobs, args.vehicles)
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.sent = 0
+        self.polls = 0
+        self.rss: List[Dict[str, float]] = []
+
+    async def _sync_request(self, client: httpx.AsyncClient):
+        response = await client.post(
+            f"/solve/{self.args.server}",
+            params={"timeout": self.args.timeout},
+            json=self.payload,
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    async def _async_request(self, client: httpx.AsyncClient):
+        response = await client.post(
+            f"/solve/{self.args.server}",
+            params={"timeout": self.args.timeout, "async": "true"},
+            json=self.payload,
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"submit HTTP {response.status_code}")
+        job_id = response.json()["id"]
+        while True:
+            await asyncio.sleep(self.args.poll_interval)
+            self.polls += 1
+            response = await client.get(f"/job/{job_id}")
+            if response.status_code != 200:
+                raise RuntimeError(f"poll HTTP {response.status_code}")
+            status = response.json()["status"]
+            if status in TERMINAL_STATUSES:
+                if status != "completed":
+                    raise RuntimeError(f"job {status}")
+                return
+
+    async def _one(self, client: httpx.AsyncClient):
+        started = time.perf_counter()
+        try:
+            if self.args.mode == "async":
+                await self._async_request(client)
+            else:
+                await self._sync_request(client)
+            self.latencies.append(time.perf_counter() - started)
+        except httpx.TimeoutException:
+            self.errors["timeout"] += 1
+        except httpx.TransportError as e:
+            self.errors[type(e).__name__] += 1
+        except RuntimeError as e:
+            self.errors[str(e)] += 1
+
+    async def _sample_rss(self, started: float):
+        while True:
+            self.rss.append({
+                "t": round(time.perf_counter() - started, 1),
+                "rss_mb": round(read_rss(self.args.backend_pid) / 2**20, 1),
+            })
+            await asyncio.sleep(self.args.rss_interval)
+
+    async def run(self) -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+        headers = {"X-API-Key": self.args.api_key} if self.args.api_key else {}
+        async with httpx.AsyncClient(
+            base_url=self.args.target, timeout=self.args.timeout + 30, limits=limits,
+            headers=headers,
+        ) as client:
+            started = time.perf_counter()
+            sampler = None
+            if self.args.backend_pid:
+                sampler = asyncio.create_task(self._sample_rss(started))
+
+            tasks = []
+            next_at = started
+            end_at = started + self.args.duration
+            while next_at < end_at:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(self._one(client)))
+                self.sent += 1
+                # Poisson arrivals unless --constant
+                gap = 1 / self.rate if self.args.constant else random.expovariate(self.rate)
+                next_at += gap
+
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+            if sampler:
+                sampler.cancel()
+
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        failed = sum(self.errors.values())
+        rss_values = [s["rss_mb"] for s in self.rss]
+        return {
+            "mode": self.args.mode,
+            "server": self.args.server,
+            "offered_rate": self.rate,
+            "duration_s": round(elapsed, 1),
+            "sent": self.sent,
+            "completed": len(self.latencies),
+            "failed": failed,
+            "error_rate": round(failed / self.sent, 4) if self.sent else 0.0,
+            "errors": dict(self.errors),
+            "throughput_rps": round(len(self.latencies) / elapsed, 2),
+            "latency_ms": {
+                "p50": ms(percentile(self.latencies, 50)),
+                "p95": ms(percentile(self.latencies, 95)),
+                "p99": ms(percentile(self.latencies, 99)),
+                "max": ms(max(self.latencies) if self.latencies else None),
+            },
+            "polls": self.polls,
+            "rss_mb": {
+                "start": rss_values[0] if rss_values else None,
+                "peak": max(rss_values) if rss_values else None,
+                "end": rss_values[-1] if rss_values else None,
+                "series": self.rss,
+            },
+        }
+
+
+def print_report(result: Dict[str, Any]):
+    lat = result["latency_ms"]
+    rss = result["rss_mb"]
+    print(
+        f"\n[{result['mode']} @ {result['offered_rate']}/s on {result['server']}] "
+        f"sent={result['sent']} ok={result['completed']} failed={result['failed']} "
+        f"({result['error_rate']:.2%})"
+    )
+    print(f"  throughput: {result['throughput_rps']} req/s")
+    print(f"  latency ms: p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}")
+    if result["mode"] == "async":
+        print(f"  job polls:  {result['polls']}")
+    if rss["peak"] is not None:
+        print(f"  backend RSS MB: start={rss['start']} peak={rss['peak']} end={rss['end']}")
+    if result["errors"]:
+        print(f"  errors: {result['errors']}")
+
+
+def wait_for(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def spawn(args: argparse.Namespace) -> List[subprocess.Popen]:
+    """Starts the stub engine and a backend proxying to it."""
+    stub = subprocess.Popen([
+        sys.executable, "-m", "src.tools.stub_engine",
+        "--port", str(args.stub_port),
+        "--latency", str(args.stub_latency),
+        "--jitter", str(args.stub_jitter),
+        "--routes", str(args.stub_routes),
+        "--steps", str(args.stub_steps),
+        "--error-rate", str(args.stub_error_rate),
+    ])
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    wait_for(stub_url)
+
+    env = {
+        **os.environ,
+        "WRAPPER_BASE_URL": stub_url,
+        "WRAPPER_REPLICA_URLS": "",
+        "API_HOST": "127.0.0.1",
+        "API_PORT": str(args.backend_port),
+        "DEBUG": "false",
+    }
+    for item in args.backend_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    backend = subprocess.Popen(
+        [sys.executable, "main.py"], env=env,
+        stdout=subprocess.DEVNULL if not args.verbose else None,
+    )
+    args.target = f"http://127.0.0.1:{args.backend_port}"
+    wait_for(args.target)
+    args.backend_pid = backend.pid
+    return [stub, backend]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--target", default="http://127.0.0.1:8080", help="Backend base URL")
+    parser.add_argument("--server", default="vroom-distribute", help="Registry entry to solve on")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--api-key", default="", help="Client API key sent as X-API-Key")
+    parser.add_argument("--rate", default="10", help="Arrival rate(s) in req/s, comma-separated")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per rate step")
+    parser.add_argument("--constant", action="store_true", help="Constant instead of Poisson arrivals")
+    parser.add_argument("--timeout", type=int, default=60, help="timeout query parameter (s)")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Async job poll interval (s)")
+    parser.add_argument("--jobs", type=int, default=50, help="Jobs per request")
+    parser.add_argument("--vehicles", type=int, default=5, help="Vehicles per request")
+    parser.add_argument("--backend-pid", type=int, default=0, help="Backend PID to sample RSS from")
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument("--json", dest="json_path", help="Write the full report to this file")
+
+    spawn_group = parser.add_argument_group("spawned stub engine and backend")
+    spawn_group.add_argument("--spawn", action="store_true")
+    spawn_group.add_argument("--backend-port", type=int, default=18080)
+    spawn_group.add_argument("--backend-env", action="append", default=[],
+                             help="KEY=VALUE setting for the spawned backend (repeatable)")
+    spawn_group.add_argument("--stub-port", type=int, default=19000)
+    spawn_group.add_argument("--stub-latency", type=float, default=0.5)
+    spawn_group.add_argument("--stub-jitter", type=float, default=0.1)
+    spawn_group.add_argument("--stub-routes", type=int, default=10)
+    spawn_group.add_argument("--stub-steps", type=int, default=20)
+    spawn_group.add_argument("--stub-error-rate", type=float, default=0.0)
+    spawn_group.add_argument("--verbose", action="store_true", help="Show backend output")
+    args = parser.parse_args()
+
+    processes = spawn(args) if args.spawn else []
+    try:
+        results = []
+        for rate in (float(r) for r in args.rate.split(",")):
+            result = asyncio.run(LoadTest(args, rate).run())
+            print_report(result)
+            results.append(result)
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump(results, f, indent=2)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
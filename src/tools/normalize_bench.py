@@ -0,0 +1,86 @@
+"""Benchmark of VROOM-format result normalization and encoding.
+
+Compares the previous path (rebuild step dicts, validate into RoutingResponse,
+dump and encode with json) with the current one (normalize in place and
+encode straight to bytes) on a synthetic solution::
+
+    python -m src.tools.normalize_bench --routes 300 --steps 70
+"""
+import argparse
+import copy
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from ..engines.normalize import dumps_bytes, normalize_vroom_response, orjson
+from ..models.response import RoutingResponse
+from .stub_engine import build_solution
+
+
+def legacy_path(vroom_response: Dict[str, Any]) -> bytes:
+    response = RoutingResponse(
+        code=vroom_response.get("code", 0),
+        summary=vroom_response.get("summary", {}),
+        unassigned=vroom_response.get("unassigned", []),
+        routes=[
+            {
+                "vehicle": route["vehicle"],
+                "cost": route["cost"],
+                "steps": [
+                    {
+                        "type": step["type"],
+                        "location": [step["location"][1], step["location"][0]],
+                        "job": step.get("job"),
+                        "arrival": step.get("arrival"),
+                        "duration": step.get("duration")
+                    }
+                    for step in route["steps"]
+                ],
+                "geometry": route.get("geometry")
+            }
+            for route in vroom_response.get("routes", [])
+        ],
+        engine="VROOM"
+    )
+    return json.dumps(response.model_dump()).encode("utf-8")
+
+
+def current_path(vroom_response: Dict[str, Any]) -> bytes:
+    return dumps_bytes(normalize_vroom_response(vroom_response, "VROOM"))
+
+
+def measure(fn: Callable[[Dict[str, Any]], bytes], solution: Dict[str, Any], runs: int) -> dict:
+    # Each run gets a fresh copy since the current path works in place
+    inputs = [copy.deepcopy(solution) for _ in range(runs + 1)]
+    times = []
+    for data in inputs[:runs]:
+        start = time.perf_counter()
+        fn(data)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(inputs[runs])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": statistics.median(times) * 1000, "peak_mb": peak / 1024 / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, default=300)
+    parser.add_argument("--steps", type=int, default=70, help="Job steps per route")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    solution = build_solution(args.routes, args.steps)
+    print(f"{args.routes} routes x {args.steps + 2} steps, "
+          f"encoder: {'orjson' if orjson is not None else 'json'}")
+    for name, fn in (("legacy", legacy_path), ("current", current_path)):
+        result = measure(fn, solution, args.runs)
+        print(f"{name:<8} {result['median_ms']:8.1f} ms  peak {result['peak_mb']:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Stub routing engine for load tests.
+
+Answers any POST with a VROOM-format solution after a configurable delay, so
+the proxy layer can be measured without a real VROOM/OSRM stack::
+
+    python -m src.tools.stub_engine --port 9000 --latency 0.5 --routes 20 --steps 50
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import Any, Dict
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+
+def build_solution(routes: int, steps: int) -> Dict[str, Any]:
+    """Builds a VROOM-format solution with routes x steps job steps."""
+    out_routes = []
+    for v in range(routes):
+        route_steps = [{"type": "start", "location": [127.0, 37.5], "arrival": 0, "duration": 0}]
+        for s in range(steps):
+            route_steps.append({
+                "type": "job",
+                "job": v * steps + s,
+                "location": [127.0 + s / 1000, 37.5 + v / 1000],
+                "arrival": s * 600,
+                "duration": s * 300,
+                "service": 300,
+                "waiting_time": 0,
+                "load": [s],
+            })
+        route_steps.append({
+            "type": "end", "location": [127.0, 37.5],
+            "arrival": steps * 600, "duration": steps * 300,
+        })
+        out_routes.append({
+            "vehicle": v,
+            "cost": steps * 300,
+            "service": steps * 300,
+            "duration": steps * 300,
+            "waiting_time": 0,
+            "steps": route_steps,
+            "geometry": "_p~iF~ps|U_ulLnnqC_mqNvxq`@" * max(1, steps // 10),
+        })
+    return {
+        "code": 0,
+        "summary": {
+            "cost": routes * steps * 300, "unassigned": 0, "delivery": [0],
+            "amount": [0], "pickup": [0], "service": routes * steps * 300,
+            "duration": routes * steps * 300, "waiting_time": 0, "priority": 0,
+        },
+        "unassigned": [],
+        "routes": out_routes,
+    }
+
+
+def create_app(latency: float, jitter: float, routes: int, steps: int, error_rate: float) -> FastAPI:
+    app = FastAPI(title="Stub Engine")
+    # The payload is identical for every request, so encode it once
+    body = json.dumps(build_solution(routes, steps)).encode()
+
+    @app.get("/{path:path}")
+    async def health(path: str):
+        return {"status": "ok"}
+
+    @app.post("/{path:path}")
+    async def solve(path: str, request: Request):
+        await request.body()
+        await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+        if error_rate and random.random() < error_rate:
+            return Response(status_code=503, content=b'{"error": "stub failure"}',
+                            media_type="application/json")
+        return Response(content=body, media_type="application/json")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean solve latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Latency std deviation (s)")
+    parser.add_argument("--routes", type=int, default=10, help="Routes per solution")
+    parser.add_argument("--steps", type=int, default=20, help="Job steps per route")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 replies")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.routes, args.steps, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 
 class Settings(BaseSettings):
@@ -9,43 +9,137 @@ class Settings(BaseSettings):
     # API settings
     api_host: str = "0.0.0.0"
     api_port: int = 8080
+    api_workers: int = 1
+
+    # Async job storage: "memory" (single worker), "sqlite" or "redis"
+    job_backend: str = "memory"
+    job_sqlite_path: str = "jobs.db"
+    job_redis_url: str = "redis://localhost:6379/0"
+    job_ttl: int = 86400
+    job_poll_interval: float = 1.0
+    # A worker holds a lease on each job it runs and renews it while solving.
+    # Jobs whose lease lapses (the worker died) go back to the queue, and
+    # fail once job_max_attempts claims were lost. Finished jobs are purged
+    # job_ttl seconds after they finish.
+    job_lease_seconds: float = 30.0
+    job_max_attempts: int = 3
+    job_purge_interval: float = 300.0
     
     # Server URLs (configurable via environment variables)
     # Docker 배포: http://vroom-wrapper-v3:8000 (routing-net 공유 네트워크)
     # 로컬 개발: http://host.docker.internal:8000 (WSL2) 또는 http://localhost:8000
     wrapper_base_url: str = "http://vroom-wrapper-v3:8000"
+    # Comma-separated list of wrapper replicas; falls back to wrapper_base_url
+    wrapper_replica_urls: str = ""
     wrapper_api_key: str = "demo-key-12345"
     ortools_local_url: str = "embedded"
     map_matching_url: str = "http://vroom-wrapper-v3:8000/map-matching/match"
 
+    # Extra registry entries as JSON, e.g.
+    # {"my-engine": {"description": "...", "engine": "entrypoint:my_engine", "url": "..."}}
+    extra_servers: Dict[str, dict] = {}
+
+    # Replica load balancing. Probes GET health_probe_path on each replica's
+    # origin; a registry entry may set its own "health_path" ("" disables)
+    health_probe_path: str = "/health"
+    health_probe_interval: float = 10.0
+    health_probe_timeout: float = 3.0
+    circuit_failure_threshold: int = 3
+    circuit_reset_timeout: float = 30.0
+    latency_ewma_alpha: float = 0.3
+    solve_max_attempts: int = 2
+    # Seconds to connect to a replica before trying the next one
+    engine_connect_timeout: float = 3.0
+
+    # Deadline propagation: solver time = remaining - max(min, remaining * ratio)
+    deadline_margin_min: float = 2.0
+    deadline_margin_ratio: float = 0.05
+    deadline_min_solver_time: float = 1.0
+    solver_time_hint_header: str = "X-Solver-Time-Limit"
+
+    # Profiling (?profile=1) is allowed only with this key in X-Admin-Key
+    admin_api_key: str = ""
+    profile_interval: float = 0.005
+
+    # How often a sync solve checks whether its client is still connected
+    disconnect_poll_interval: float = 1.0
+
+    # Client API keys (X-API-Key) as JSON, e.g.
+    # {"<key>": {"tenant": "dispatch", "weight": 4, "rate": 5, "burst": 10,
+    #            "concurrency": {"basic": 4, "premium": 1}}}
+    # Without keys every caller shares the "anonymous" tenant. A rate of 0
+    # and tiers missing from the concurrency quotas are unlimited.
+    client_api_keys: Dict[str, dict] = {}
+    client_api_key_header: str = "X-API-Key"
+    default_rate_limit: float = 0.0
+    default_rate_burst: int = 20
+    default_weight: float = 1.0
+    default_concurrency: Dict[str, int] = {}
+    # Solve slots per worker; async jobs never take the last sync_reserved_solves
+    max_concurrent_solves: int = 32
+    sync_reserved_solves: int = 4
+
+    # Viewport queries (/job/{id}/features): grid cells per side of a job's
+    # extent, and the approximate memory (MB) of job indexes each worker keeps
+    spatial_grid_size: int = 128
+    spatial_index_cache_mb: int = 256
+
+    @property
+    def wrapper_base_urls(self) -> List[str]:
+        """Returns the wrapper replica base URLs."""
+        urls = [u.strip().rstrip("/") for u in self.wrapper_replica_urls.split(",")]
+        return [u for u in urls if u] or [self.wrapper_base_url]
+
+    def _wrapper_urls(self, path: str) -> List[str]:
+        return [f"{base}{path}" for base in self.wrapper_base_urls]
+
     @property
     def server_registry(self) -> Dict[str, dict]:
-        """Returns a registry of available routing servers."""
-        return {
+        """Returns a registry of available routing servers.
+
+        Each entry names its ``engine`` type (see ``src.engines.registry``)
+        and lists its replicas under ``urls``; ``url`` is kept as the first
+        replica for callers that only need a single address. ``tier``
+        ("basic" or "premium") selects the per-key concurrency quota.
+        """
+        registry = {
             "vroom-distribute": {
                 "description": "VROOM Direct (OSRM)",
-                "url": f"{self.wrapper_base_url}/distribute",
+                "engine": "http",
+                "urls": self._wrapper_urls("/distribute"),
             },
             "vroom-optimize": {
                 "description": "VROOM Optimize (Full)",
-                "url": f"{self.wrapper_base_url}/optimize",
+                "engine": "http",
+                "urls": self._wrapper_urls("/optimize"),
                 "api_key": self.wrapper_api_key,
             },
             "vroom-optimize-basic": {
                 "description": "VROOM Optimize (Basic)",
-                "url": f"{self.wrapper_base_url}/optimize/basic",
+                "engine": "http",
+                "urls": self._wrapper_urls("/optimize/basic"),
                 "api_key": self.wrapper_api_key,
             },
             "vroom-optimize-premium": {
                 "description": "VROOM Optimize (Premium)",
-                "url": f"{self.wrapper_base_url}/optimize/premium",
+                "engine": "http",
+                "tier": "premium",
+                "urls": self._wrapper_urls("/optimize/premium"),
                 "api_key": self.wrapper_api_key,
             },
             "ortools-local": {
                 "description": "OR-Tools (Euclidean)",
-                "url": self.ortools_local_url,
+                "engine": "ortools" if self.ortools_local_url == "embedded" else "http",
+                "urls": [self.ortools_local_url],
             },
         }
+        for name, info in self.extra_servers.items():
+            registry[name] = {"engine": "http", **info}
+        for info in registry.values():
+            info.setdefault("urls", [info["url"]] if info.get("url") else [])
+            info.setdefault("tier", "basic")
+            info["url"] = info["urls"][0] if info["urls"] else None
+        return registry
     
     class Config:
         env_file = ".env"
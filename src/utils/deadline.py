@@ -0,0 +1,26 @@
+import time
+from .config import settings
+
+
+class Deadline:
+    """Tracks the time left of a solve's ``timeout`` budget."""
+
+    def __init__(self, timeout: float):
+        self.timeout = float(timeout)
+        self.expires_at = time.monotonic() + self.timeout
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def solver_budget(self) -> float:
+        """Time the solver itself may use.
+
+        Leaves a margin for transport and serialization so a solver that
+        stops on its limit still answers before the deadline.
+        """
+        remaining = self.remaining()
+        margin = max(settings.deadline_margin_min, remaining * settings.deadline_margin_ratio)
+        return max(settings.deadline_min_solver_time, remaining - margin)
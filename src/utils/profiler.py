@@ -0,0 +1,52 @@
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+from .config import settings
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread and emits folded stacks.
+
+    The output is the "collapsed" format read by flamegraph.pl, speedscope
+    and inferno. Only the profiled thread is sampled, which for async
+    handlers is the event loop thread, so concurrent requests on the same
+    loop show up too.
+    """
+
+    def __init__(self, interval: Optional[float] = None, thread_id: Optional[int] = None):
+        self.interval = interval or settings.profile_interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
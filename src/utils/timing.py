@@ -0,0 +1,77 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+_current_timer: ContextVar[Optional["RequestTimer"]] = ContextVar("current_timer", default=None)
+
+
+class RequestTimer:
+    """Collects named phase durations for one request or job."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def mark(self, name: str):
+        """Records the time since the previous mark (or start) as a phase."""
+        now = time.perf_counter()
+        self.add(name, now - self._last)
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.add(name, end - start)
+            self._last = end
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, float]:
+        """Phase durations in milliseconds."""
+        timings = {name: round(s * 1000, 2) for name, s in self.phases.items()}
+        timings["total"] = round(self.total() * 1000, 2)
+        return timings
+
+    def header(self) -> str:
+        """Formats the phases as a Server-Timing header value."""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.as_dict().items())
+
+    def activate(self):
+        return _current_timer.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current_timer.reset(token)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current_timer.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Times a block as a phase of the active timer, if there is one."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+    else:
+        with timer.phase(name):
+            yield
+
+
+def record_phase(name: str, seconds: float):
+    """Adds a phase to the active timer; a no-op outside instrumented code."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
@@ -0,0 +1,62 @@
+from src.services.analysis import analyze_solution
+
+
+def ortools_result():
+    # Shaped like OrToolsClient._convert_to_response_format: the route's
+    # vehicle is an index, arrivals are cumulative costs, durations service time
+    return {
+        "engine": "OR-Tools",
+        "unassigned": [],
+        "routes": [{
+            "vehicle": 1,
+            "cost": 1500,
+            "steps": [
+                {"type": "start", "arrival": 0, "duration": 0},
+                {"type": "job", "job": 1, "arrival": 700, "duration": 300},
+                {"type": "job", "job": 2, "arrival": 1100, "duration": 300},
+                {"type": "end", "arrival": 1500, "duration": 0},
+            ],
+        }],
+    }
+
+
+def test_ortools_routes_are_reported_by_request_vehicle_id():
+    request = {
+        "jobs": [{"id": 1}, {"id": 2}],
+        "vehicles": [{"id": 10, "capacity": [4]}, {"id": 20, "capacity": [8]}],
+    }
+    vehicle = analyze_solution(ortools_result(), request)["vehicles"][0]
+
+    assert vehicle["vehicle"] == 20
+    assert vehicle["capacity"] == [8]
+    assert vehicle["stops"] == 2
+    assert vehicle["distance"] == 1500
+
+
+def test_ortools_metrics_without_a_source_are_none():
+    analysis = analyze_solution(ortools_result(), {"vehicles": [{"id": 10}, {"id": 20}]})
+    vehicle = analysis["vehicles"][0]
+
+    for name in ("duration", "span", "service", "waiting_time"):
+        assert vehicle[name] is None
+        assert analysis["fleet"]["percentiles"][name] is None
+
+
+def test_vroom_durations_come_from_the_last_step():
+    result = {
+        "routes": [{
+            "vehicle": 7,
+            "steps": [
+                {"type": "start", "arrival": 0, "duration": 0, "distance": 0},
+                {"type": "job", "arrival": 600, "duration": 600, "distance": 5000, "service": 120},
+                {"type": "end", "arrival": 1300, "duration": 1180, "distance": 9000},
+            ],
+        }],
+    }
+    vehicle = analyze_solution(result)["vehicles"][0]
+
+    assert vehicle["vehicle"] == 7
+    assert vehicle["distance"] == 9000
+    assert vehicle["duration"] == 1180
+    assert vehicle["span"] == 1300
+    assert vehicle["service"] == 120
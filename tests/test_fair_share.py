@@ -0,0 +1,30 @@
+from src.services.fair_share import FairShare
+from src.utils.config import settings
+
+
+def test_key_without_tenant_keeps_its_config_and_hides_the_key(monkeypatch):
+    monkeypatch.setattr(settings, "client_api_keys", {
+        "secret-key-123": {"weight": 4, "rate": 1, "concurrency": {"premium": 1}},
+    })
+    scheduler = FairShare()
+
+    tenant = scheduler.resolve("secret-key-123")
+
+    assert tenant.weight == 4
+    assert tenant.bucket.rate == 1
+    assert tenant.concurrency["premium"] == 1
+    assert "secret-key-123" not in tenant.name
+    # The scheduler finds the same tenant again by the name stored on jobs
+    assert FairShare().tenant(tenant.name).weight == 4
+    assert "secret-key-123" not in str(scheduler.snapshot())
+
+
+def test_named_tenant_is_shared_by_its_keys(monkeypatch):
+    monkeypatch.setattr(settings, "client_api_keys", {
+        "key-1": {"tenant": "dispatch", "weight": 4},
+        "key-2": {"tenant": "dispatch", "weight": 4},
+    })
+    scheduler = FairShare()
+
+    assert scheduler.resolve("key-1") is scheduler.resolve("key-2")
+    assert scheduler.resolve("key-1").name == "dispatch"
@@ -0,0 +1,174 @@
+import asyncio
+
+from src.models.job import JobStatus
+from src.services import job_manager as job_manager_module
+from src.services.job_manager import JobManager
+from src.services.fair_share import FairShare
+from src.services.job_store import InMemoryJobStore
+from src.services.metrics import metrics
+from src.utils.config import settings
+
+
+class SlowEngine:
+    location_order = "latlng"
+
+    async def solve_raw(self, request, deadline):
+        await asyncio.sleep(60)
+        return {"routes": []}
+
+
+class QuickEngine:
+    location_order = "latlng"
+
+    async def solve_raw(self, request, deadline):
+        await asyncio.sleep(0)
+        return {"routes": []}
+
+
+class RecordingFairShare(FairShare):
+    def __init__(self):
+        super().__init__()
+        self.started = []
+
+    def start_async(self, job, tier):
+        self.started.append(job.tenant)
+        return super().start_async(job, tier)
+
+
+async def wait_for_status(manager, job_id, status):
+    for _ in range(200):
+        job = await manager.get_job(job_id)
+        if job.status == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {status}")
+
+
+def test_stop_requeues_running_jobs(monkeypatch):
+    monkeypatch.setattr(job_manager_module.engine_registry, "get", lambda server: SlowEngine())
+    cancelled_before = metrics.counters["jobs_cancelled"]
+
+    async def scenario():
+        manager = JobManager(store=InMemoryJobStore())
+        manager.start()
+        job = await manager.create_job("vroom-optimize", {"jobs": [], "vehicles": []})
+        await wait_for_status(manager, job.id, JobStatus.PROCESSING)
+        await manager.stop()
+        return await manager.get_job(job.id)
+
+    job = asyncio.run(scenario())
+    assert job.status == JobStatus.PENDING
+    assert job.attempts == 0
+    assert job.result is None
+    # Shutting down is not a user cancellation
+    assert metrics.counters["jobs_cancelled"] == cancelled_before
+
+
+def test_cancel_aborts_running_job(monkeypatch):
+    monkeypatch.setattr(job_manager_module.engine_registry, "get", lambda server: SlowEngine())
+
+    async def scenario():
+        manager = JobManager(store=InMemoryJobStore())
+        manager.start()
+        job = await manager.create_job("vroom-optimize", {"jobs": [], "vehicles": []})
+        await wait_for_status(manager, job.id, JobStatus.PROCESSING)
+        await manager.cancel_job(job.id)
+        await asyncio.sleep(0.05)
+        running = dict(manager._running_jobs)
+        await manager.stop()
+        return await manager.get_job(job.id), running
+
+    job, running = asyncio.run(scenario())
+    assert job.status == JobStatus.CANCELLED
+    assert running == {}
+
+
+def test_backlog_of_one_tenant_does_not_starve_another(monkeypatch):
+    monkeypatch.setattr(job_manager_module.engine_registry, "get", lambda server: QuickEngine())
+    monkeypatch.setattr(settings, "client_api_keys", {
+        "batch-key": {"tenant": "batch"},
+        "dispatch-key": {"tenant": "dispatch", "weight": 4},
+    })
+    # One async slot, so jobs start strictly one after another
+    monkeypatch.setattr(settings, "max_concurrent_solves", 5)
+    monkeypatch.setattr(settings, "sync_reserved_solves", 4)
+    recorder = RecordingFairShare()
+    monkeypatch.setattr(job_manager_module, "fair_share", recorder)
+    request = {"jobs": [{"id": 1}], "vehicles": []}
+
+    async def scenario():
+        manager = JobManager(store=InMemoryJobStore())
+        for _ in range(150):
+            await manager.create_job("vroom-optimize", request, tenant="batch")
+        for _ in range(5):
+            await manager.create_job("vroom-optimize", request, tenant="dispatch")
+        manager.start()
+        for _ in range(500):
+            if len(recorder.started) >= 22:
+                break
+            await asyncio.sleep(0.01)
+        await manager.stop()
+
+    asyncio.run(scenario())
+    assert recorder.started[:10].count("dispatch") == 5
+
+
+def test_manager_built_outside_a_loop_runs_in_each_new_loop(monkeypatch):
+    monkeypatch.setattr(job_manager_module.engine_registry, "get", lambda server: QuickEngine())
+    # Like the global job_manager, built at import time
+    manager = JobManager(store=InMemoryJobStore())
+
+    async def scenario():
+        manager.start()
+        job = await manager.create_job("vroom-optimize", {"jobs": [], "vehicles": []})
+        await wait_for_status(manager, job.id, JobStatus.COMPLETED)
+        await manager.stop()
+
+    asyncio.run(scenario())
+    asyncio.run(scenario())
+
+
+def test_spatial_index_is_built_on_first_query_and_bounded_by_size(monkeypatch):
+    monkeypatch.setattr(job_manager_module.engine_registry, "get", lambda server: QuickEngine())
+    monkeypatch.setattr(settings, "spatial_index_cache_mb", 0)
+
+    async def scenario():
+        manager = JobManager(store=InMemoryJobStore())
+        manager.start()
+        first = await manager.create_job("vroom-optimize", {"jobs": [], "vehicles": []})
+        second = await manager.create_job("vroom-optimize", {"jobs": [], "vehicles": []})
+        first = await wait_for_status(manager, first.id, JobStatus.COMPLETED)
+        second = await wait_for_status(manager, second.id, JobStatus.COMPLETED)
+        await manager.stop()
+        built_on_completion = len(manager._indexes)
+        await manager.get_spatial_index(first.id)
+        index = await manager.get_spatial_index(second.id)
+        return built_on_completion, list(manager._indexes), manager._indexes_bytes, index, second.id
+
+    built_on_completion, cached, cached_bytes, index, second_id = asyncio.run(scenario())
+    assert built_on_completion == 0
+    # Over the limit, only the most recently used index is kept
+    assert cached == [second_id]
+    assert cached_bytes == index.nbytes > 0
+
+
+def test_cached_spatial_index_does_not_load_the_job(monkeypatch):
+    monkeypatch.setattr(job_manager_module.engine_registry, "get", lambda server: QuickEngine())
+
+    async def scenario():
+        store = InMemoryJobStore()
+        manager = JobManager(store=store)
+        manager.start()
+        job = await manager.create_job("vroom-optimize", {"jobs": [], "vehicles": []})
+        await wait_for_status(manager, job.id, JobStatus.COMPLETED)
+        await manager.stop()
+        first = await manager.get_spatial_index(job.id)
+
+        async def no_get(job_id):
+            raise AssertionError("loaded the whole job")
+
+        monkeypatch.setattr(store, "get", no_get)
+        return first, await manager.get_spatial_index(job.id)
+
+    first, second = asyncio.run(scenario())
+    assert first is second
@@ -0,0 +1,190 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.job import AsyncJob, JobStatus
+from src.services.job_store import InMemoryJobStore, SQLiteJobStore
+from src.utils.config import settings
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+
+def create_job(store, server="vroom-optimize", tenant=None):
+    job = AsyncJob.create(server, {"jobs": [], "vehicles": []}, tenant=tenant)
+    run(store.create(job))
+    return job
+
+
+def test_claim_hands_a_job_to_exactly_one_caller(store):
+    job = create_job(store)
+
+    async def claim_many():
+        return await asyncio.gather(*(store.claim(job.id) for _ in range(20)))
+
+    winners = [j for j in run(claim_many()) if j is not None]
+    assert len(winners) == 1
+    assert winners[0].status == JobStatus.PROCESSING
+    assert winners[0].lease_id is not None
+    assert winners[0].attempts == 1
+
+
+def test_sqlite_claim_is_atomic_across_workers(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    workers = [SQLiteJobStore(path) for _ in range(4)]
+    jobs = [create_job(workers[0]) for _ in range(10)]
+
+    def drain(store):
+        claimed = []
+        while True:
+            job = run(store.claim_next())
+            if job is None:
+                return claimed
+            claimed.append(job.id)
+
+    with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+        results = list(pool.map(drain, workers))
+    claimed = [job_id for ids in results for job_id in ids]
+    assert sorted(claimed) == sorted(job.id for job in jobs)
+
+
+def test_transition_requires_an_allowed_status(store):
+    create_job(store)
+    job = run(store.claim_next())
+
+    job.mark(JobStatus.COMPLETED)
+    assert not run(store.transition(job, [JobStatus.PENDING]))
+    assert run(store.transition(job, [JobStatus.PROCESSING]))
+
+    job.mark(JobStatus.CANCELLED)
+    assert not run(store.transition(job, [JobStatus.PENDING, JobStatus.PROCESSING]))
+    assert run(store.get(job.id)).status == JobStatus.COMPLETED
+
+
+def test_completion_and_cancellation_race_has_one_winner(store):
+    create_job(store)
+    claimed = run(store.claim_next())
+    completed = claimed.model_copy(deep=True)
+    completed.mark(JobStatus.COMPLETED)
+    cancelled = claimed.model_copy(deep=True)
+    cancelled.mark(JobStatus.CANCELLED)
+
+    async def race():
+        return await asyncio.gather(
+            store.transition(completed, [JobStatus.PROCESSING]),
+            store.transition(cancelled, [JobStatus.PENDING, JobStatus.PROCESSING]),
+        )
+
+    assert sorted(run(race())) == [False, True]
+
+
+def test_expired_lease_is_reclaimed_and_stale_holder_locked_out(store, monkeypatch):
+    create_job(store)
+    monkeypatch.setattr(settings, "job_lease_seconds", -1.0)
+    stale = run(store.claim_next())
+
+    assert run(store.reclaim_expired()) == 1
+    assert run(store.get(stale.id)).status == JobStatus.PENDING
+
+    monkeypatch.setattr(settings, "job_lease_seconds", 30.0)
+    current = run(store.claim(stale.id))
+    assert current.attempts == 2
+    assert not run(store.renew(stale))
+    assert run(store.renew(current))
+
+    stale.mark(JobStatus.COMPLETED)
+    assert not run(store.transition(stale, [JobStatus.PROCESSING]))
+    assert run(store.get(stale.id)).lease_id == current.lease_id
+
+
+def test_live_lease_is_not_reclaimed(store):
+    create_job(store)
+    run(store.claim_next())
+    assert run(store.reclaim_expired()) == 0
+
+
+def test_job_fails_after_max_attempts(store, monkeypatch):
+    job = create_job(store)
+    monkeypatch.setattr(settings, "job_lease_seconds", -1.0)
+    for _ in range(settings.job_max_attempts):
+        assert run(store.claim(job.id)) is not None
+        assert run(store.reclaim_expired()) == 1
+    failed = run(store.get(job.id))
+    assert failed.status == JobStatus.FAILED
+    assert "lost the job" in failed.error
+
+
+def test_requeue_does_not_use_up_an_attempt(store):
+    job = create_job(store)
+    claimed = run(store.claim(job.id))
+    assert run(store.requeue(claimed))
+    requeued = run(store.get(job.id))
+    assert requeued.status == JobStatus.PENDING
+    assert requeued.attempts == 0
+
+
+def test_purge_removes_only_old_finished_jobs(store):
+    old = create_job(store)
+    create_job(store)
+    claimed = run(store.claim(old.id))
+    claimed.mark(JobStatus.COMPLETED)
+    run(store.transition(claimed, [JobStatus.PROCESSING]))
+
+    assert run(store.purge(datetime.utcnow() - timedelta(hours=1))) == 0
+    assert run(store.purge(datetime.utcnow() + timedelta(seconds=1))) == 1
+    assert run(store.get(old.id)) is None
+    assert len(run(store.pending_heads())) == 1
+
+
+def test_pending_heads_are_the_oldest_job_per_tenant_and_server(store):
+    batch = [create_job(store, tenant="batch") for _ in range(3)]
+    dispatch = create_job(store, tenant="dispatch")
+    other = create_job(store, server="osrm", tenant="batch")
+    run(store.claim(batch[0].id))
+
+    heads = {(h.tenant, h.server): h.id for h in run(store.pending_heads())}
+    assert heads == {
+        ("batch", "vroom-optimize"): batch[1].id,
+        ("dispatch", "vroom-optimize"): dispatch.id,
+        ("batch", "osrm"): other.id,
+    }
+
+
+def test_memory_store_shares_payloads_but_not_fields():
+    store = InMemoryJobStore()
+    job = create_job(store)
+    first = run(store.get(job.id))
+    second = run(store.get(job.id))
+
+    # Payloads are not copied per read
+    assert first.request_data is second.request_data
+    first.metadata["seen"] = True
+    first.mark(JobStatus.CANCELLED)
+    assert run(store.get(job.id)).metadata == {}
+    assert run(store.get(job.id)).status == JobStatus.PENDING
+
+
+def test_summary_has_status_and_owner_without_payloads(store):
+    job = create_job(store, tenant="dispatch")
+    claimed = run(store.claim(job.id))
+    claimed.metadata["location_order"] = "latlng"
+    claimed.result = {"routes": []}
+    claimed.mark(JobStatus.COMPLETED)
+    run(store.transition(claimed, [JobStatus.PROCESSING]))
+
+    summary = run(store.get_summary(job.id))
+    assert summary.status == JobStatus.COMPLETED
+    assert summary.tenant == "dispatch"
+    assert summary.metadata == {"location_order": "latlng"}
+    assert not hasattr(summary, "result")
+    assert run(store.get_summary("missing")) is None
@@ -0,0 +1,33 @@
+import asyncio
+
+import httpx
+
+from src.services.load_balancer import EngineBalancer
+from src.utils.config import settings
+from src.utils.deadline import Deadline
+
+
+def test_connect_timeout_moves_on_to_another_replica(monkeypatch):
+    monkeypatch.setattr(settings, "engine_connect_timeout", 0.5)
+    timeouts = {}
+
+    def handler(request):
+        timeouts[request.url.host] = request.extensions["timeout"]
+        if request.url.host == "blackholed":
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return httpx.Response(200, json={"routes": []})
+
+    balancer = EngineBalancer()
+    balancer.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    config = {"urls": ["http://blackholed/optimize", "http://healthy/optimize"]}
+
+    async def scenario():
+        # Both replicas idle, so the first one listed is tried first
+        return await balancer.post(config, {}, {}, 60, Deadline(60))
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert balancer.replicas["http://blackholed/optimize"].total_failures == 1
+    # Connecting is bounded separately from the solve budget
+    assert timeouts["blackholed"]["connect"] == 0.5
+    assert timeouts["healthy"]["read"] > 50
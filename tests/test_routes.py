@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+
+from src.api import routes
+from src.models.job import JobStatus
+from src.services.metrics import metrics
+from src.utils.config import settings
+
+
+class SlowEngine:
+    location_order = "latlng"
+
+    def __init__(self):
+        self.cancelled = False
+
+    async def solve_raw(self, request, deadline):
+        try:
+            await asyncio.sleep(6)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"routes": []}
+
+
+async def call(path, body=b"", method="POST", disconnect_after=None, headers=()):
+    """Drives the ASGI app directly, optionally going away after some seconds."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path.split("?")[0],
+        "raw_path": path.split("?")[0].encode(),
+        "query_string": path.partition("?")[2].encode(),
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), *headers],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    gone = asyncio.Event()
+    if disconnect_after is not None:
+        asyncio.get_running_loop().call_later(disconnect_after, gone.set)
+    body_sent = False
+    messages = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await routes.app(scope, receive, send)
+    return messages
+
+
+def test_sync_solve_is_cancelled_when_the_client_disconnects(monkeypatch):
+    engine = SlowEngine()
+    monkeypatch.setattr(routes.engine_registry, "get", lambda server: engine)
+    monkeypatch.setattr(settings, "disconnect_poll_interval", 0.05)
+    disconnected_before = metrics.counters["sync_solves_disconnected"]
+
+    started = time.monotonic()
+    messages = asyncio.run(call(
+        "/solve/vroom-optimize?timeout=10",
+        json.dumps({"jobs": [], "vehicles": []}).encode(),
+        disconnect_after=0.3,
+    ))
+
+    assert time.monotonic() - started < 2
+    assert engine.cancelled
+    assert metrics.counters["sync_solves_disconnected"] == disconnected_before + 1
+    assert messages[0]["status"] == 499
+
+
+def test_responses_carry_server_timing():
+    messages = asyncio.run(call("/", method="GET"))
+    headers = dict(messages[0]["headers"])
+    assert messages[0]["status"] == 200
+    assert b"total;dur=" in headers[b"server-timing"]
+
+
+def test_jobs_are_only_visible_to_their_tenant(monkeypatch):
+    monkeypatch.setattr(settings, "client_api_keys", {
+        "key-a": {"tenant": "a"},
+        "key-b": {"tenant": "b"},
+    })
+    header = settings.client_api_key_header.lower().encode()
+
+    async def scenario():
+        job = await routes.job_manager.create_job("vroom-optimize", {"jobs": [], "vehicles": []}, tenant="a")
+        as_b = [(header, b"key-b")]
+        responses = [
+            await call(f"/job/{job.id}", method="GET", headers=as_b),
+            await call(f"/job/{job.id}/analysis", method="GET", headers=as_b),
+            await call(f"/job/{job.id}/features?bbox=0,0,1,1", method="GET", headers=as_b),
+            await call(f"/job/{job.id}", method="DELETE", headers=as_b),
+        ]
+        owner = await call(f"/job/{job.id}", method="GET", headers=[(header, b"key-a")])
+        return [r[0]["status"] for r in responses], owner[0]["status"], await routes.job_manager.get_job(job.id)
+
+    statuses, owner_status, job = asyncio.run(scenario())
+    assert statuses == [404, 404, 404, 404]
+    assert owner_status == 200
+    assert job.status == JobStatus.PENDING
+
+
+class WrapperEngine:
+    location_order = "latlng"
+
+    async def solve_raw(self, request, deadline):
+        return {"routes": [], "analysis": {"quality_score": 90.0}}
+
+
+def test_plan_analysis_leaves_the_wrapper_analysis_alone(monkeypatch):
+    monkeypatch.setattr(routes.engine_registry, "get", lambda server: WrapperEngine())
+    messages = asyncio.run(call(
+        "/solve/vroom-optimize?analysis=true",
+        json.dumps({"jobs": [], "vehicles": []}).encode(),
+    ))
+    body = json.loads(b"".join(m.get("body", b"") for m in messages[1:]))
+    assert body["analysis"] == {"quality_score": 90.0}
+    assert body["plan_analysis"]["fleet"]["vehicles_used"] == 0
+
+
+def test_polling_a_job_does_not_spend_the_rate_limit(monkeypatch):
+    monkeypatch.setattr(settings, "client_api_keys", {
+        "poll-key": {"tenant": "poller", "rate": 1, "burst": 1},
+    })
+    as_poller = [(settings.client_api_key_header.lower().encode(), b"poll-key")]
+    request = json.dumps({"jobs": [], "vehicles": []}).encode()
+
+    async def scenario():
+        submitted = await call("/solve/vroom-optimize?async=true", request, headers=as_poller)
+        job_id = json.loads(submitted[1]["body"])["id"]
+        polls = [await call(f"/job/{job_id}", method="GET", headers=as_poller) for _ in range(5)]
+        resubmitted = await call("/solve/vroom-optimize?async=true", request, headers=as_poller)
+        return [p[0]["status"] for p in polls], resubmitted[0]["status"]
+
+    polls, resubmitted = asyncio.run(scenario())
+    assert polls == [200] * 5
+    assert resubmitted == 429